@@ -0,0 +1,4 @@
+"""
+Micro-benchmarks of the helpers in functions.py and classes.py, run from the bot's working directory with
+`python -m benchmarks`
+"""
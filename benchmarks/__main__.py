@@ -0,0 +1,78 @@
+import argparse
+import os
+import sys
+import time
+import urllib.request
+
+import config
+from benchmarks import bench, fixtures
+from benchmarks import suite  # registers the benchmarks
+
+RESULTS_DIR = "./data/benchmarks"
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024:
+            return "%.1f%s" % (n, unit)
+        n /= 1024
+    return "%.1fGiB" % n
+
+
+def save_pages() -> None:
+    """Saves the pages the news cogs fetch, so the `.saved` benchmarks measure real content"""
+    os.makedirs(fixtures.DATA_DIR, exist_ok=True)
+    for url, name in ((config.GMO_NEWS_URL, fixtures.GMO_PAGE), (config.TS_NEWS_URL_RLP, fixtures.TS_PAYLOAD)):
+        with urllib.request.urlopen(url, timeout=30) as r:
+            data = r.read()
+        with open(os.path.join(fixtures.DATA_DIR, name), "wb") as f:
+            f.write(data)
+        print("Saved %s to %s (%s)" % (url, name, format_bytes(len(data))))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Runs the micro-benchmarks of the bot's helpers")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all if none are given")
+    parser.add_argument("--list", action="store_true", help="lists the benchmarks and their sizes")
+    parser.add_argument("--quick", action="store_true", help="only the smallest and largest size with shorter loops")
+    parser.add_argument("--output", help="json file of the results, by default a new file in %s" % RESULTS_DIR)
+    parser.add_argument("--compare", metavar="FILE", help="json file of an earlier run to compare with")
+    parser.add_argument("--save-pages", action="store_true", help="saves the current news pages for the `.saved` benchmarks")
+    args = parser.parse_args()
+
+    if args.save_pages:
+        save_pages()
+        return 0
+
+    if args.list:
+        for bm in bench.BENCHMARKS.values():
+            print("%-25s sizes %s" % (bm.name, ", ".join(map(str, bm.sizes))))
+        return 0
+
+    unknown = [n for n in args.names if n not in bench.BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmarks: %s" % ", ".join(unknown))
+
+    previous = bench.load(args.compare) if args.compare else {}
+
+    print("%-30s %14s %12s %10s %10s %s" % ("benchmark", "ops/sec", "per op", "stdev", "peak mem", "change" if previous else ""))
+
+    def report(result: bench.Result) -> None:
+        change = ""
+        if result.key in previous:
+            change = "%+.1f%%" % ((result.ops_per_sec / previous[result.key]["ops_per_sec"] - 1) * 100)
+        print("%-30s %14.1f %10.2fus %8.2fus %10s %s" % (
+            result.key, result.ops_per_sec, result.seconds_per_op * 1e6, result.stdev * 1e6,
+            format_bytes(result.peak_bytes), change
+        ))
+
+    results = bench.run(args.names or None, quick=args.quick, report=report)
+
+    path = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    bench.save(results, path)
+    print("Results saved to %s" % path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
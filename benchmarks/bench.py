@@ -0,0 +1,153 @@
+"""Measuring of the benchmarks and storing of the results"""
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Iterable, Optional
+
+BENCHMARKS: dict[str, "Benchmark"] = {}
+
+
+class Benchmark:
+
+    """
+    A function measured for several input sizes. `setup` is called once per size, outside of the measurement, and
+    returns the call which is measured
+    """
+
+    __slots__ = ("name", "setup", "sizes")
+
+    def __init__(self, name: str, setup: Callable[[int], Callable[[], Any]], sizes: tuple[int, ...]):
+        self.name = name
+        self.setup = setup
+        self.sizes = sizes
+
+
+def benchmark(name: str, sizes: Iterable[int] = (1,)) -> Callable:
+    """Registers the decorated setup function as a benchmark"""
+    def decorator(setup: Callable[[int], Callable[[], Any]]) -> Callable[[int], Callable[[], Any]]:
+        BENCHMARKS[name] = Benchmark(name, setup, tuple(sizes))
+        return setup
+    return decorator
+
+
+class Result:
+
+    __slots__ = ("name", "size", "ops_per_sec", "seconds_per_op", "stdev", "peak_bytes")
+
+    def __init__(self, name: str, size: int, ops_per_sec: float, seconds_per_op: float, stdev: float, peak_bytes: int):
+        self.name = name
+        self.size = size
+        self.ops_per_sec = ops_per_sec
+        self.seconds_per_op = seconds_per_op
+        self.stdev = stdev
+        self.peak_bytes = peak_bytes
+
+    @property
+    def key(self) -> str:
+        return "%s[%i]" % (self.name, self.size)
+
+    def to_json(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in Result.__slots__}
+
+
+def calibrate(func: Callable[[], Any], min_time: float) -> int:
+    """Returns how often the function has to be called in a loop to take at least `min_time` seconds"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2 if number < 1000 else 10
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """Returns the bytes allocated at most during one call"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(name: str, size: int, func: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> Result:
+    """
+    Times `repeat` loops of the function and uses the fastest one, the slower ones were disturbed by something else
+    @return: the operations per second of the fastest loop, the standard deviation of the time per operation over
+        all loops and the peak memory of a single call
+    @rtype: Result
+    """
+    func()  # warm up caches and lazy imports
+    number = calibrate(func, min_time)
+
+    times = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            times.append((time.perf_counter() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    best = min(times)
+    mean = sum(times) / len(times)
+    stdev = (sum((t - mean) ** 2 for t in times) / len(times)) ** 0.5
+    return Result(name, size, 1 / best if best else float("inf"), best, stdev, peak_memory(func))
+
+
+def run(names: Optional[Iterable[str]] = None, *, quick: bool = False, report: Callable[[Result], Any] = print) -> list[Result]:
+    """
+    Runs the benchmarks, all registered ones if `names` is None
+    @param quick: only the smallest and the largest size with shorter loops
+    @param report: called with every result as soon as it is measured
+    """
+    results = []
+    for name in names if names is not None else BENCHMARKS:
+        bm = BENCHMARKS[name]
+        sizes = bm.sizes if not quick or len(bm.sizes) <= 2 else (bm.sizes[0], bm.sizes[-1])
+        for size in sizes:
+            result = measure(name, size, bm.setup(size), *((3, 0.05) if quick else (5, 0.2)))
+            report(result)
+            results.append(result)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(results: list[Result], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "results": [r.to_json() for r in results]
+        }, f, indent=4)
+
+
+def load(path: str) -> dict[str, dict[str, Any]]:
+    """Returns the results of a saved run by `name[size]`"""
+    with open(path, "r", encoding="utf-8") as f:
+        jsn = json.load(f)
+    return {"%s[%i]" % (r["name"], r["size"]): r for r in jsn["results"]}
@@ -0,0 +1,136 @@
+"""
+Generated inputs shaped like the data the bot handles: articles of the GMO news page, payloads of the tagesschau api2,
+teamwork files and source code of debug snippets. They are built from a fixed seed, so every run measures the same input.
+Real pages saved with `python -m benchmarks --save-pages` are read from `DATA_DIR`
+"""
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+SEED = 2021
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+GMO_PAGE = "gmo.html"
+TS_PAYLOAD = "ts-rlp.json"
+
+
+def saved(name: str) -> Optional[str]:
+    """Returns the content of a saved page or None if it was not saved"""
+    try:
+        with open(os.path.join(DATA_DIR, name), "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+WORDS = (
+    "schule", "unterricht", "termin", "klasse", "abitur", "projekt", "woche", "elternabend", "ausflug", "sport",
+    "musik", "theater", "bibliothek", "mensa", "ferien", "zeugnis", "lehrer", "schüler", "*wichtig*", "info_brief",
+)
+
+
+def words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def gmo_paragraph(rng: random.Random, i: int) -> str:
+    kind = i % 5
+    if kind == 0:
+        return '<p><strong>%s</strong> %s</p>' % (words(rng, 3).title(), words(rng, 25))
+    elif kind == 1:
+        return '<p>%s <a href="https://www.gmo-online.de/aktuelles/%i.html">%s</a> %s</p>' % (
+            words(rng, 12), i, words(rng, 2), words(rng, 10)
+        )
+    elif kind == 2:
+        return '<ul><li>%s</li><li>%s</li><li>%s</li></ul>' % (words(rng, 6), words(rng, 6), words(rng, 6))
+    elif kind == 3:
+        return '<p><em>%s</em><br/>%s &amp; %s</p>' % (words(rng, 8), words(rng, 15), words(rng, 4))
+    return '<p><img alt="%s" src="https://www.gmo-online.de/images/%i.jpg"/></p>' % (words(rng, 2), i)
+
+
+def gmo_article(paragraphs: int, seed: int = SEED) -> str:
+    """Returns the html of one `newseintrag` of the GMO news page with the given number of paragraphs"""
+    rng = random.Random(seed)
+    return (
+        '<div class="newseintrag">'
+        '<p class="datum">%02i.%02i.2021</p>'
+        '<p class="titel"><a href="https://www.gmo-online.de/aktuelles/artikel.html">%s</a></p>'
+        '%s</div>'
+    ) % (rng.randint(1, 28), rng.randint(1, 12), words(rng, 4).title(), "".join(gmo_paragraph(rng, i) for i in range(paragraphs)))
+
+
+def gmo_page(articles: int, paragraphs: int = 8, seed: int = SEED) -> str:
+    """Returns a GMO news page with the given number of articles"""
+    return "<html><body><div id=\"news\">%s</div></body></html>" % "".join(
+        gmo_article(paragraphs, seed + i) for i in range(articles)
+    )
+
+
+def ts_article(rng: random.Random, i: int) -> dict[str, Any]:
+    date = datetime(2021, 5, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+    return {
+        "sophoraId": "rlp-%i" % i,
+        "externalId": "tagesschau_fm-ts-%i" % (100000 + i),
+        "title": words(rng, 6).title(),
+        "firstSentence": words(rng, 30) + ".",
+        "date": date.isoformat(),
+        "region": rng.randint(1, 16),
+        "tags": [{"tag": w} for w in rng.sample(WORDS, 4)],
+        "updateCheckUrl": "https://www.tagesschau.de/api2/%i/updatecheck.json" % i,
+        "teaserImage": {
+            "alttext": words(rng, 5),
+            "videowebl": {"imageurl": "https://www.tagesschau.de/image/%i/videowebl.jpg" % i},
+            "videowebm": {"imageurl": "https://www.tagesschau.de/image/%i/videowebm.jpg" % i},
+            "videowebs": {"imageurl": "https://www.tagesschau.de/image/%i/videowebs.jpg" % i},
+        },
+        "details": "https://www.tagesschau.de/api2/inland/regional/%i.json" % i,
+        "detailsweb": "https://www.tagesschau.de/inland/regional/%i.html" % i,
+        "shareURL": "https://www.tagesschau.de/inland/regional/%i.html" % i,
+        "topline": words(rng, 2).title(),
+        "breakingNews": rng.random() < 0.05,
+        "type": "story",
+    }
+
+
+def ts_payload(articles: int, seed: int = SEED) -> dict[str, Any]:
+    """Returns a response of the tagesschau api2 news endpoint with the given number of articles"""
+    rng = random.Random(seed)
+    return {
+        "news": [ts_article(rng, i) for i in range(articles)],
+        "regional": [],
+        "newStoriesCountLink": "https://www.tagesschau.de/api2/news/?since=1",
+        "type": "news",
+    }
+
+
+def team_file(owners: int, teams_per_owner: int = 3, members: int = 10, seed: int = SEED) -> dict[str, list[dict[str, Any]]]:
+    """Returns the content of the teamwork file in the layout of `Team.to_json`"""
+    rng = random.Random(seed)
+    data = {}
+    for _ in range(owners):
+        owner_id = rng.randint(10 ** 17, 10 ** 18)
+        data[str(owner_id)] = [
+            {
+                "name": "team-%s" % words(rng, 1),
+                "members": ["<@%i>" % rng.randint(10 ** 17, 10 ** 18) for _ in range(members)],
+                "owner_id": owner_id,
+                "description": words(rng, 10),
+                "channel_id": rng.randint(10 ** 17, 10 ** 18),
+            }
+            for _ in range(teams_per_owner)
+        ]
+    return data
+
+
+def python_source(lines: int, seed: int = SEED) -> str:
+    """Returns source code like the snippets of the debug command, with strings and names the checks look for"""
+    rng = random.Random(seed)
+    templates = (
+        "x%i = [m.id for m in ctx.guild.members if m.bot]",
+        "await ctx.send(\"found %i members with 'open' in their name\")",
+        "value%i = {\"key\": 'token', \"count\": len(ctx.guild.roles)}",
+        "# count the roles %i",
+        "for role in ctx.guild.roles[:%i]: print(role.name)",
+        "result%i = sum(len(c.members) for c in ctx.guild.channels)",
+    )
+    return "\n".join(rng.choice(templates) % i for i in range(lines))
@@ -0,0 +1,139 @@
+"""
+The benchmarks of the helpers in functions.py and classes.py. The size is the number of paragraphs, articles, owners or
+lines of the fixture, so the results of one benchmark show how it scales. The benchmarks of saved pages are only
+registered if the pages were saved, their size is always 1
+"""
+import asyncio
+import atexit
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import discord
+
+import config
+import parsing
+from classes import CodeString
+from functions import (
+    embed_message, escape_dc_chars, get_datetime_from_str, get_timedelta_from_time, html_to_dc_md,
+    make_json_serializable, pyformat, secure_link
+)
+from storage import STORAGE
+
+from benchmarks import fixtures
+from benchmarks.bench import benchmark
+
+TMP_DIR = tempfile.mkdtemp(prefix="bot-benchmarks-")
+atexit.register(shutil.rmtree, TMP_DIR, True)
+
+
+@benchmark("html_to_dc_md", sizes=(1, 10, 100))
+def bench_html_to_dc_md(paragraphs: int):
+    html = fixtures.gmo_article(paragraphs)
+    return lambda: html_to_dc_md(html)
+
+
+@benchmark("secure_link", sizes=(1, 10, 100))
+def bench_secure_link(articles: int):
+    links = " ".join(a["shareURL"] + "?title=" + a["title"] for a in fixtures.ts_payload(articles)["news"])
+    return lambda: secure_link(links)
+
+
+@benchmark("escape_dc_chars", sizes=(1, 10, 100))
+def bench_escape_dc_chars(articles: int):
+    text = "\n".join(a["firstSentence"] for a in fixtures.ts_payload(articles)["news"])
+    return lambda: escape_dc_chars(text)
+
+
+@benchmark("embed_message", sizes=(0, 5, 25))
+def bench_embed_message(fields: int):
+    article = fixtures.ts_payload(1)["news"][0]
+    timestamp = datetime.fromisoformat(article["date"])
+    pairs = [(article["topline"], article["firstSentence"][:1024])] * fields
+    return lambda: embed_message(
+        title=article["title"],
+        description=article["firstSentence"],
+        url=article["shareURL"],
+        image=article["teaserImage"]["videowebl"]["imageurl"],
+        color=discord.Color.orange(),
+        timestamp=timestamp,
+        author=config.TS_AUTHOR,
+        fields=pairs
+    )
+
+
+@benchmark("pyformat", sizes=(1, 10, 100))
+def bench_pyformat(articles: int):
+    payload = fixtures.ts_payload(articles)
+    return lambda: pyformat(payload)
+
+
+@benchmark("make_json_serializable", sizes=(1, 10, 100))
+def bench_make_json_serializable(articles: int):
+    payload = fixtures.ts_payload(articles)
+    # values json can not store, like the debug command's results have
+    for article in payload["news"]:
+        article["date"] = datetime.fromisoformat(article["date"]).astimezone(timezone.utc)
+        article["tags"] = {t["tag"] for t in article["tags"]}
+    return lambda: make_json_serializable(payload)
+
+
+@benchmark("Storage.save_on_path", sizes=(10, 100, 1000))
+def bench_storage_save_on_path(owners: int):
+    data = fixtures.team_file(owners)
+    file = os.path.join(TMP_DIR, "teamwork-%i.json" % owners)
+    with open(file, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    path = "%s/0/description" % next(iter(data))
+    # one loop for all calls, like the bot has, so only the save and the hop to the storage thread are measured
+    loop = asyncio.new_event_loop()
+    atexit.register(loop.close)
+    return lambda: loop.run_until_complete(STORAGE.save_on_path(file, path, "_No description_"))
+
+
+@benchmark("get_timedelta_from_time")
+def bench_get_timedelta_from_time(_: int):
+    return lambda: get_timedelta_from_time("2d12h30min")
+
+
+@benchmark("get_datetime_from_str")
+def bench_get_datetime_from_str(_: int):
+    return lambda: get_datetime_from_str("24.12.2021 18:30")
+
+
+@benchmark("CodeString.contains", sizes=(10, 100, 1000))
+def bench_code_string_contains(lines: int):
+    # the name is not in the source, so the whole code is scanned like for an allowed snippet
+    code = CodeString(fixtures.python_source(lines))
+    return lambda: code.contains("__import__", func=True)
+
+
+def bench_gmo_page(html: str):
+    # what GMO_News does with a fetched page, without the executor
+    return lambda: [parsing.render_gmo_article(a["html"]) for a in parsing.find_gmo_articles(html)]
+
+
+@benchmark("gmo_pipeline", sizes=(1, 10))
+def bench_gmo_pipeline(articles: int):
+    return bench_gmo_page(fixtures.gmo_page(articles))
+
+
+if fixtures.saved(fixtures.GMO_PAGE) is not None:
+    @benchmark("gmo_pipeline.saved")
+    def bench_gmo_pipeline_saved(_: int):
+        return bench_gmo_page(fixtures.saved(fixtures.GMO_PAGE))
+
+
+if fixtures.saved(fixtures.TS_PAYLOAD) is not None:
+    @benchmark("escape_dc_chars.saved")
+    def bench_escape_dc_chars_saved(_: int):
+        news = json.loads(fixtures.saved(fixtures.TS_PAYLOAD))["news"]
+        text = "\n".join(a.get("firstSentence", "") for a in news)
+        return lambda: escape_dc_chars(text)
+
+    @benchmark("pyformat.saved")
+    def bench_pyformat_saved(_: int):
+        payload = json.loads(fixtures.saved(fixtures.TS_PAYLOAD))
+        return lambda: pyformat(payload)
@@ -1,4 +1,13 @@
+import ast
+import bisect
+import hashlib
+import io
+import time
+import tokenize
+from collections import OrderedDict
+from array import array
 from string import ascii_letters, digits
+from typing import Any, Iterable, Optional
 
 class CodeString(str):
     def __init__(self, value):
@@ -6,10 +15,9 @@ class CodeString(str):
         self.value = value
 
     def contains(self, other: str, in_string=None, func=False, lower=False) -> bool:
-        if lower:
-            self.value = self.value.lower()
+        value = self.value.lower() if lower else self.value
         quoted = False
-        for i in range(len(other) - 1, len(self.value)):
+        for i in range(len(other) - 1, len(value)):
             if quoted and in_string == False:
                 continue
             elif not quoted and in_string == True:
@@ -17,15 +25,15 @@ class CodeString(str):
             elif i - len(other) < int(quoted) and quoted:
                 continue
 
-            if self.value[i] in ("\"", "\'"):
+            if value[i] in ("\"", "\'"):
                 quoted = i if quoted else False
                 continue
 
-            if other == self.value[i - len(other) + 1:i + 1]:
+            if other == value[i - len(other) + 1:i + 1]:
                 if func:
-                    if (" " + self.value)[
+                    if (" " + value)[
                         i - len(other) + 1
-                    ] not in ascii_letters and (self.value + " ")[i + 1] not in (
+                    ] not in ascii_letters and (value + " ")[i + 1] not in (
                         ascii_letters + digits
                     ):
                         return True
@@ -36,3 +44,265 @@ class CodeString(str):
 
     def __str__(self) -> str:
         return self.value
+
+
+
+
+class CodeScanner:
+
+    """
+    Tokenizes a program once and collects its identifiers, imports, attribute chains and string literals,
+    so every restriction rule of the debug command is a set lookup or a scan of the literals
+    """
+
+    def __init__(self, source: str):
+        self.names: set[str] = set()
+        self.attributes: set[str] = set()
+        self.imports: set[str] = set()
+        self.strings: list[str] = []
+
+        tokens = [
+            t for t in tokenize.generate_tokens(io.StringIO(source).readline)
+            if t.type not in (tokenize.COMMENT, tokenize.NL, tokenize.INDENT, tokenize.DEDENT)
+        ]
+
+        chain: list[str] = []
+        i = 0
+        while i < len(tokens):
+            tok = tokens[i]
+
+            if tok.type == tokenize.NAME and tok.string in ("import", "from"):
+                i = self.__read_import(tokens, i)
+                chain = []
+                continue
+
+            if tok.type == tokenize.NAME:
+                self.names.add(tok.string)
+                if not (chain and tokens[i - 1].string == "."):
+                    chain = []
+                chain.append(tok.string)
+                # every prefix of `a.b.c` is an attribute chain as well
+                self.attributes.add(".".join(chain))
+
+            elif tok.type == tokenize.STRING:
+                try:
+                    literal = ast.literal_eval(tok.string)
+                except (ValueError, SyntaxError):
+                    literal = tok.string
+                self.strings.append(literal.decode("utf-8", "replace") if isinstance(literal, bytes) else str(literal))
+
+            elif tok.type == getattr(tokenize, "FSTRING_MIDDLE", None):
+                self.strings.append(tok.string)
+
+            elif tok.string != ".":
+                chain = []
+
+            i += 1
+
+        self.__lower_strings = [x.lower() for x in self.strings]
+
+    def __read_import(self, tokens: list[tokenize.TokenInfo], i: int) -> int:
+        """Reads `import a.b as c, d` or `from a import b, c` starting at token i and returns the index after it"""
+        from_module = None
+        if tokens[i].string == "from":
+            i, from_module = self.__read_dotted(tokens, i + 1)
+            self.imports.add(from_module)
+            if i < len(tokens) and tokens[i].string == "import":
+                i += 1
+
+        else:
+            i += 1
+
+        while i < len(tokens) and tokens[i].type not in (tokenize.NEWLINE, tokenize.ENDMARKER) and tokens[i].string != ";":
+            if tokens[i].type == tokenize.NAME and tokens[i].string != "as":
+                i, name = self.__read_dotted(tokens, i)
+                if from_module is None:
+                    self.imports.add(name)
+                else:
+                    self.imports.add(from_module + ("" if from_module.endswith(".") else ".") + name)
+                self.names.add(name.split(".")[0])
+                # skip the alias
+                if i < len(tokens) and tokens[i].string == "as":
+                    i += 2
+                continue
+            i += 1
+        return i
+
+    @staticmethod
+    def __read_dotted(tokens: list[tokenize.TokenInfo], i: int) -> tuple[int, str]:
+        parts = []
+        # relative imports start with dots
+        while i < len(tokens) and tokens[i].string in (".", "..."):
+            parts.append(tokens[i].string)
+            i += 1
+        while i < len(tokens) and tokens[i].type == tokenize.NAME and tokens[i].string != "import":
+            parts.append(tokens[i].string)
+            i += 1
+            if i >= len(tokens) or tokens[i].string != ".":
+                break
+            parts.append(".")
+            i += 1
+        return i, "".join(parts)
+
+    def imports_module(self, module: str) -> bool:
+        """Whether the module, one of its submodules or a name from it is imported"""
+        return any(i == module or i.startswith(module + ".") for i in self.imports)
+
+    def uses_attribute(self, chain: str) -> bool:
+        return chain in self.attributes
+
+    def uses_name(self, name: str) -> bool:
+        return name in self.names
+
+    def string_contains(self, text: str, lower: bool = False) -> bool:
+        if lower:
+            text = text.lower()
+            return any(text in x for x in self.__lower_strings)
+        return any(text in x for x in self.strings)
+
+
+class GuildSnapshot:
+
+    """Roles and channels of a guild fetched in bulk at one point in time"""
+
+    def __init__(self, guild_id: int, roles: Iterable[Any], channels: Iterable[Any]):
+        self.guild_id = guild_id
+        self.taken_at = time.monotonic()
+        self.roles: dict[str, Any] = {r.name: r for r in roles}
+        self.channels: dict[int, Any] = {c.id: c for c in channels}
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+    def get_role(self, name: str) -> Optional[Any]:
+        return self.roles.get(name)
+
+    def get_channel(self, channel_id: int) -> Optional[Any]:
+        return self.channels.get(channel_id)
+
+    def forget_role(self, name: str) -> None:
+        self.roles.pop(name, None)
+
+    def forget_channel(self, channel_id: int) -> None:
+        self.channels.pop(channel_id, None)
+
+
+class Team:
+
+    """A team of the teamwork extension. Members are kept as ids and only rendered as mentions for discord"""
+
+    __slots__ = ("name", "owner_id", "channel_id", "description", "members")
+
+    def __init__(self, name: str, owner_id: int, channel_id: int, members: Iterable[int] = (), description: str = "_No description_"):
+        self.name = name
+        self.owner_id = owner_id
+        self.channel_id = channel_id
+        self.description = description
+        # snowflakes fit into unsigned 64 bit; kept sorted without duplicates, so membership is a binary search
+        self.members = array("Q", sorted(set(members)))
+
+    @classmethod
+    def from_json(cls, jsn: dict[str, Any]) -> "Team":
+        return cls(
+            name=jsn["name"],
+            owner_id=int(jsn["owner_id"]),
+            channel_id=int(jsn["channel_id"]),
+            members=(int(m.strip("<@!&>")) for m in jsn["members"]),
+            description=jsn["description"]
+        )
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "members": self.mentions,
+            "owner_id": self.owner_id,
+            "description": self.description,
+            "channel_id": self.channel_id
+        }
+
+    @property
+    def role_name(self) -> str:
+        return self.name + str(self.owner_id)
+
+    @property
+    def mentions(self) -> list[str]:
+        return ["<@!%i>" % m for m in self.members]
+
+    def add_member(self, member_id: int) -> bool:
+        i = bisect.bisect_left(self.members, member_id)
+        if i < len(self.members) and self.members[i] == member_id:
+            return False
+        self.members.insert(i, member_id)
+        return True
+
+    def remove_member(self, member_id: int) -> bool:
+        i = bisect.bisect_left(self.members, member_id)
+        if i == len(self.members) or self.members[i] != member_id:
+            return False
+        self.members.pop(i)
+        return True
+
+    def __contains__(self, member_id: int) -> bool:
+        i = bisect.bisect_left(self.members, member_id)
+        return i < len(self.members) and self.members[i] == member_id
+
+    def __setstate__(self, state: tuple[Any, dict[str, Any]]) -> None:
+        # restart snapshots of older versions have unsorted members or a member_set
+        for name, value in state[1].items():
+            if name in Team.__slots__:
+                setattr(self, name, value)
+        self.members = array("Q", sorted(set(self.members)))
+
+    def __repr__(self) -> str:
+        return "Team(name=%r, owner_id=%i, channel_id=%i, members=%i)" % (self.name, self.owner_id, self.channel_id, len(self.members))
+
+
+class CodeCache:
+
+    """LRU cache for compiled code objects of the debug command"""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__cache: OrderedDict[tuple[str, bool], Any] = OrderedDict()
+
+    @staticmethod
+    def make_key(source: str, privileged: bool) -> tuple[str, bool]:
+        # the exact source which is compiled, any normalization belongs to the caller
+        return hashlib.sha256(source.encode("utf-8")).hexdigest(), privileged
+
+    def get(self, key: tuple[str, bool]) -> Optional[Any]:
+        try:
+            code = self.__cache[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.__cache.move_to_end(key)
+        self.hits += 1
+        return code
+
+    def put(self, key: tuple[str, bool], code: Any) -> None:
+        self.__cache[key] = code
+        self.__cache.move_to_end(key)
+        while len(self.__cache) > self.maxsize:
+            self.__cache.popitem(last=False)
+
+    def clear(self) -> None:
+        self.__cache.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.__cache),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": 100 * self.hits / total if total else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self.__cache)
@@ -1,8 +1,16 @@
 import ast
+import asyncio
+import cProfile
+import io
 import logging
+import marshal
 import os
+import pstats
 import sys
+import time
+import tokenize
 import tracemalloc
+from types import CodeType
 from typing import Optional
 
 import config
@@ -12,24 +20,103 @@ from discord.errors import *
 from discord.ext import commands
 from discord.ext.commands.errors import *
 from functions import *
+import error_reports
+import loop_watchdog
+import metrics
+import reloader
+import restart
+from sampler import SamplingProfiler
+from sandbox import SnippetPool
+
+
+class ModuleRepresenter:
+
+    """Class used to represent a module with missing or more attributes for saftey"""
+
+    def __init__(self, name, repr):
+        self.name: str = name
+        self.__repr = repr
+
+    def __repr__(self) -> str:
+        return self.__repr
+
+
+class DebugSession:
+
+    """The namespace of one developer which keeps the variables between programs"""
+
+    __slots__ = ("base", "namespace")
+
+    def __init__(self, base: dict[str, Any]):
+        self.base = base
+        self.namespace = dict(base)
+
+    def user_vars(self) -> dict[str, Any]:
+        """Returns the variables which were defined or overwritten by the programs"""
+        return {
+            k: v for k, v in self.namespace.items()
+            if k not in Debug.SESSION_VARS and (k not in self.base or self.base[k] is not v)
+        }
+
+    def rebase(self, base: dict[str, Any]) -> None:
+        user_vars = self.user_vars()
+        self.base = base
+        self.namespace = dict(base, **user_vars)
 
 
 class Debug(commands.Cog):
+
+    FN_NAME = "_user_expr"
+    CODE_CACHE_SIZE = 128
+    SANDBOX_WORKERS = 2
+    SANDBOX_TIMEOUT = 10.0
+    SANDBOX_MEMORY_LIMIT = 256 * 1024 ** 2
+    PROFILE_TOP = 30
+    PROFILE_PAGE_SIZE = 10
+    PROFILE_TRACEBACK_DEPTH = 10
+    SAMPLE_MAX_SECONDS = 300
+    RESULT_PAGE_SIZE = 1980
+    RESULT_MAX_PAGES = 10
+    RESULT_MAX_CHARS = 200_000
+    STATS_PAGE_SIZE = 20
+    # set for every program and never kept by a session
+    SESSION_VARS = ("ctx", "help", "print", "__builtins__", FN_NAME)
+    # kept when the extension is hot reloaded
+    PERSISTENT_STATE = ("sessions", "code_cache")
+
     def __init__(self, bot):
         commands.Cog.__init__(self)
         self.bot: commands.Bot = bot
+        self.code_cache = CodeCache(Debug.CODE_CACHE_SIZE)
+        self.base_namespaces: dict[bool, dict[str, Any]] = {}
+        self.namespace_key: tuple = ()
+        self.sessions: dict[int, DebugSession] = {}
+        self.reloader = reloader.MANAGER = reloader.ReloadManager(bot)
+        for name, e in self.reloader.check().items():
+            logging.warning("Module '%s' can't be reloaded: %s", name, e)
+        self.sampler = SamplingProfiler()
+        self.sandbox = SnippetPool(
+            Debug.FN_NAME,
+            size=Debug.SANDBOX_WORKERS,
+            timeout=Debug.SANDBOX_TIMEOUT,
+            memory_limit=Debug.SANDBOX_MEMORY_LIMIT
+        )
+        self.bot.loop.create_task(self.sandbox.start())
+
+    def cog_unload(self):
+        self.sandbox.close()
 
     async def cog_check(self, ctx) -> bool:
         log = (ctx.invoked_with != "help")
         r = True
         if log:
-            logging.debug("Checking debug access from %s" % ctx.author)
+            logging.debug("Checking debug access from %s", ctx.author)
         r = has_role(ctx.author, config.ROLES["developer"]["id"])
         if log:
-            logging.debug("debug access result: %s" % r)
+            logging.debug("debug access result: %s", r)
 
         if r and log:
-            logging.info("debug command '%s' executed by %s" % (ctx.invoked_with, ctx.author))
+            logging.info("debug command '%s' executed by %s", ctx.invoked_with, ctx.author)
 
         return r
         
@@ -64,7 +151,7 @@ class Debug(commands.Cog):
                 ))
             else:
                 successfully.append(name)
-                logging.log(25, "Reloaded extension %s" % name)
+                logging.log(25, "Reloaded extension %s", name)
 
         if successfully:
             await ctx.send(
@@ -88,7 +175,7 @@ class Debug(commands.Cog):
                 ))
             else:
                 successfully.append(name)
-                logging.log(25, "Unloaded extension %s" % name)
+                logging.log(25, "Unloaded extension %s", name)
 
         if successfully:
             await ctx.send(
@@ -112,7 +199,7 @@ class Debug(commands.Cog):
                 ))
             else:
                 successfully.append(name)
-                logging.log(25, "Laded extension %s" % name)
+                logging.log(25, "Laded extension %s", name)
 
         if successfully:
             await ctx.send(
@@ -120,6 +207,35 @@ class Debug(commands.Cog):
             )
 
 
+    @commands.command(
+        name="reload_module",
+        aliases=["rmod", "hotreload"],
+        description="Reloads the given module(s) and every module or extension importing them",
+        help="Reloads e.g. `functions`, `config` or `cogs.teamwork` without reconnecting. Modules importing a reloaded " \
+             "module are reloaded afterwards, so `from ... import *` bindings are updated, and cogs keep their state. " \
+             "Modules running threads or queues, like `logs` or `outbound`, are not reloaded and need a restart. " \
+             "Without modules every module is checked for whether it can be reloaded"
+    )
+    async def reload_module(self, ctx, *module_names):
+        if not module_names:
+            errors = self.reloader.check()
+            await ctx.send(embed=create_console_message(
+                "\n".join(">> %s: %s" % (name, e) for name, e in errors.items()) or ">> Every module can be reloaded"
+            ))
+            return
+
+        try:
+            order = self.reloader.reload(module_names)
+        except Exception as e:
+            await ctx.send(embed=embed_error(
+                error=e,
+                bot=self.bot.user,
+            ))
+        else:
+            await ctx.send(
+                embed=create_console_message(">> Reloaded %s" % " -> ".join(order))
+            )
+
     @commands.command(
         name="debug",
         aliases=["d", "e", "cmd", "run"],
@@ -131,91 +247,57 @@ class Debug(commands.Cog):
     )
     async def execute(self, ctx, *, prgm: str) -> Any:
         """Executes the program"""
-        prgm = parse_prgm(prgm)
-        prgm = CodeString(prgm)
-
-        # prevents using the TOKEN in your code if you are not owner
-        # importing the token with `import config.TOKEN` and `from config import TOKEN` are restricted as well
-        if (prgm.contains("import builtins", in_string=False) or prgm.contains("from builtins", in_string=False)
-            and ctx.author.id not in config.OWNER_IDS
-            ):
-            await ctx.send(embed=embed_message(
-                title="Warning",
-                description="Due to saftey from the bot token which is restricted to bot owner there are functions restricted.\n" \
-                            "That's why you don't need to import the builtins module. You are sooooooo ein Idiot <@%s>\n" % ctx.author.id,
-                color=config.COLOR.WARNING,
-                author=self.bot.user
-            ))
+        code = await self.get_code(ctx, prgm)
+        if code is None:
             return
 
-        # all imports which can result in problems for token safety
-        if ((prgm.contains("config.TOKEN", in_string=False) 
-                or prgm.contains(config.file_path, in_string=True)
-                or prgm.contains("from config", in_string=False)
-                or prgm.contains("config.config_file_path")
-                or prgm.contains("import config")
-                or prgm.contains("token", lower=True, in_string=True)
-                or prgm.contains("import os", in_string=False)
-                or prgm.contains("os import")
-            )
-            and ctx.author.id not in config.OWNER_IDS
-            ):
-            await ctx.send(embed=embed_message(
-                title="Warning",
-                description="Due to saftey from the bot token which is restricted to bot owner there are functions restricted.\n" \
-                            "Please don't import the json library, config vars or call the open functions",
-                color=config.COLOR.WARNING,
-                author=self.bot.user
-            ))
-            return
-
-        fn_name = "_user_expr"
-        prgm = prgm.strip("` ")
-
-        # removes discord syntax highlighting if it exists
-        if prgm.split("\n")[0] == "py" or prgm.split("\n")[0] == "python":
-            prgm = "\n".join(prgm.split("\n")[1:])
-
-        # add a layer of indentation
-        prgm = "\n".join(["  " + l for l in prgm.splitlines()])
-
-        # wrap in async def body
-        body = f"async def {fn_name}():\n{prgm}"
-
-        try:
-            parsed = ast.parse(body, mode="exec")
-        except Exception as e:
-            await ctx.send(embed=embed_error(error=e))
-            return
-      
-        body = parsed.body[0].body  # type: ignore
-
-        insert_ast_returns(body)
-
-        class ModuleRepresenter:
-
-            """Class used to represent a module with missing or more attributes for saftey"""
-
-            def __init__(self, name, repr):
-                self.name: str = name
-                self.__repr = repr
-
-            def __repr__(self) -> str:
-                return self.__repr
-
-        if ctx.author.id not in config.OWNER_IDS:
+        vars = self.get_session(ctx)
+        ok, result = await self.run_code(ctx, code, vars)
+        if ok:
+            vars["_"] = result
+            await self.send_result(ctx, result)
+
+    async def get_code(self, ctx, prgm: str) -> Optional[CodeType]:
+        """Returns the compiled program from the cache or compiles it. Returns None if it was rejected"""
+        prgm = Debug.normalize_prgm(prgm)
+        # the security checks depend on the privilege, so it is part of the key
+        key = CodeCache.make_key(prgm, ctx.author.id in config.OWNER_IDS)
+        code = self.code_cache.get(key)
+        if code is None:
+            code = await self.compile_prgm(ctx, prgm)
+            if code is not None:
+                self.code_cache.put(key, code)
+        return code
+
+    def get_base_namespace(self, privileged: bool) -> dict[str, Any]:
+        """
+        Returns the namespace every session starts with. It is built once per privilege and rebuilt after the config
+        or an extension was (re)loaded
+        """
+        # config.reload creates a new `data` dict and a reloaded extension a new cog object
+        key = (config.data, *self.bot.cogs.values())
+        if len(key) != len(self.namespace_key) or any(a is not b for a, b in zip(key, self.namespace_key)):
+            self.namespace_key = key
+            self.base_namespaces.clear()
+            logging.debug("Debug namespaces are outdated and will be rebuilt")
+
+        if privileged not in self.base_namespaces:
+            self.base_namespaces[privileged] = self.build_namespace(privileged)
+        return self.base_namespaces[privileged]
+
+    def build_namespace(self, privileged: bool) -> dict[str, Any]:
+        if not privileged:
             # overwrite modules
             config_ = ModuleRepresenter("config", repr(config))
 
             # remove values
             for key in dir(config):
-                if key not in ("TOKEN", "OWNER_IDS"):
+                if key not in ("TOKEN", "OWNER_IDS", "SERVICE"):
                     setattr(config_, key, getattr(config, key))
     
         # defining globals
         vars = dict(globals().copy(), **locals().copy())
         vars["bot"] = self.bot
-        vars["ctx"] = ctx
         vars["debug"] = self
         vars["cogs"] = self.bot.cogs
 
@@ -223,7 +305,7 @@ class Debug(commands.Cog):
         for cog_name in list(self.bot.cogs):
             vars[cog_name.lower()] = self.bot.cogs[cog_name]
         
-        if ctx.author.id not in config.OWNER_IDS:
+        if not privileged:
             # overwrite problematic built-in functions
             #vars["eval"] = not_allowed("eval(...) cannot be used in discord")
             #vars["exec"] = not_allowed("exec(...) cannot be used in discord")
@@ -232,20 +314,35 @@ class Debug(commands.Cog):
             vars["open"] = dc_open
         
             for var in config.RESTRICTED_DEBUG_VARS:
-                vars.pop(var)
+                vars.pop(var, None)
 
             vars["config"] = config_   # type: ignore for pylance
-        
+
+        return vars
+
+    def get_session(self, ctx) -> dict[str, Any]:
+        """Returns the namespace of the author which keeps the variables of previous programs"""
+        base = self.get_base_namespace(ctx.author.id in config.OWNER_IDS)
+        session = self.sessions.get(ctx.author.id)
+
+        if session is None:
+            session = self.sessions[ctx.author.id] = DebugSession(base)
+        elif session.base is not base:
+            session.rebase(base)
+
+        vars = session.namespace
+        vars["ctx"] = ctx
         vars["help"] = not_allowed("you do not need to use help(...). You are an developer. you are such a ばか <@%s>" % ctx.author.id)
         vars["print"] = dc_print(ctx.channel, ctx.author)
-        
-        tracemalloc.start()
-        exec(compile(parsed, filename="<ast>", mode="exec"), vars)
-        tracemalloc.stop()
+        return vars
+
+    async def run_code(self, ctx, code: CodeType, vars: dict[str, Any]) -> tuple[bool, Any]:
+        """Runs the compiled program in the namespace. Errors are sent to the channel and the first value is False"""
+        exec(code, vars)
 
         # run the functiion defined with exec
         try:
-            result = await eval(f"{fn_name}()", vars)
+            result = await eval(f"{Debug.FN_NAME}()", vars)
         except AccessError as e:
             await ctx.send(embed=embed_message(
                 title="Warning",
@@ -254,17 +351,23 @@ class Debug(commands.Cog):
                 author=ctx.bot.user,
                 timestamp=True
             ))
-            return
+            return False, None
 
         except Exception as e:
             # send error if occurred
             await ctx.send(embed=embed_error(error=e))
-            return
+            return False, None
         finally:
             for f in config.FILE_FP:
                 if callable(f.close):
                     f.close()
 
+            if isinstance(vars.get("print"), ConsoleBuffer):
+                await vars["print"].close()
+
+        return True, result
+
+    async def send_result(self, ctx, result: Any) -> None:
         # if result is discord message item; it doesn't send it beacaus probably a message was send pr
         if isinstance(result, (discord.Message, discord.abc.Messageable)):
             return 
@@ -273,29 +376,408 @@ class Debug(commands.Cog):
             if result.name == "config":
                 result = config
         
-        answer = pyformat(result)[:1991]
-        try:
-            # send result in embed in an code block with python highlighting
-            await ctx.send(embed=embed_message(
+        answer = pyformat(result, max_chars=Debug.RESULT_MAX_CHARS)
+
+        # split into pages at line ends
+        chunks = []
+        while answer and len(chunks) < Debug.RESULT_MAX_PAGES:
+            chunk = answer[:Debug.RESULT_PAGE_SIZE]
+            if len(answer) > Debug.RESULT_PAGE_SIZE and (cut := chunk.rfind("\n")) > 0:
+                chunk = chunk[:cut + 1]
+            chunks.append(chunk)
+            answer = answer[len(chunk):]
+
+        # send result in embeds in an code block with python highlighting
+        pages = [
+            embed_message(
                 title="Console output",
-                description="```py\n" + answer + "```",
+                description="```py\n" + chunk + "```",
                 color="teal",
                 author=self.bot.user
-            ))
+            )
+            for chunk in chunks or ["\u200B"]
+        ]
+        if len(pages) > 1:
+            for i, page in enumerate(pages, start=1):
+                page.set_footer(text="Page %i/%i" % (i, len(pages)))
+
+        extra = {}
+        if answer:
+            # everything which does not fit on the pages is attached
+            extra["file"] = discord.File(io.BytesIO(("".join(chunks) + answer).encode("utf-8")), filename="result.txt")
+
+        try:
+            await send_pages(self.bot, ctx.channel, pages, user=ctx.author, **extra)
         except HTTPException as e:
             traceback.print_exception(type(e), e, e.__traceback__)
 
+    @commands.command(
+        name="profile",
+        aliases=["prof", "cprofile"],
+        description="Runs a in discord written program under cProfile and tracemalloc",
+        help="Works like `debug`, but the program is profiled. The slowest functions by cumulative time and the biggest " \
+             "allocation sites are shown on pages and the raw pstats are attached (open them with `pstats.Stats(file)`). " \
+             "Other tasks running while the program awaits are profiled as well"
+    )
+    async def profile(self, ctx, *, prgm: str) -> None:
+        code = await self.get_code(ctx, prgm)
+        if code is None:
+            return
+
+        vars = self.get_session(ctx)
+        profiler = cProfile.Profile()
+
+        tracemalloc.start(Debug.PROFILE_TRACEBACK_DEPTH)
+        before = tracemalloc.take_snapshot()
+        profiler.enable()
+        try:
+            ok, result = await self.run_code(ctx, code, vars)
+        finally:
+            profiler.disable()
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+        if ok:
+            await self.send_result(ctx, result)
+
+        stats = pstats.Stats(profiler)
+        pages = self.get_profile_pages(stats, after.compare_to(before, "lineno"))
+        await send_pages(
+            self.bot, ctx.channel, pages, user=ctx.author,
+            file=discord.File(io.BytesIO(marshal.dumps(stats.stats)), filename="profile.pstats")  # type: ignore
+        )
+
+    def get_profile_pages(self, stats: pstats.Stats, allocations: list[tracemalloc.StatisticDiff]) -> list[discord.Embed]:
+        rows = sorted(stats.stats.items(), key=lambda x: x[1][3], reverse=True)[:Debug.PROFILE_TOP]  # type: ignore
+        lines = [
+            "%8.2fms %8.2fms %6s  %s" % (ct * 1000, tt * 1000, nc, pstats.func_std_string(func))
+            for func, (cc, nc, tt, ct, callers) in rows
+        ]
+        pages = [
+            embed_message(
+                title="Profile: cumulative time",
+                description="```\n%10s %10s %6s  %s\n%s```" % ("cumtime", "tottime", "calls", "function", "\n".join(chunk))[:4000],
+                color=config.COLOR.INFO
+            )
+            for chunk in (lines[i:i + Debug.PROFILE_PAGE_SIZE] for i in range(0, len(lines), Debug.PROFILE_PAGE_SIZE))
+        ]
+
+        allocations = [a for a in allocations if a.size_diff > 0][:Debug.PROFILE_TOP]
+        lines = [
+            "%+10.1fKiB %+7i  %s:%s" % (a.size_diff / 1024, a.count_diff, a.traceback[0].filename, a.traceback[0].lineno)
+            for a in allocations
+        ]
+        pages.extend(
+            embed_message(
+                title="Profile: allocations",
+                description="```\n%s```" % "\n".join(chunk)[:4000],
+                color=config.COLOR.INFO
+            )
+            for chunk in (lines[i:i + Debug.PROFILE_PAGE_SIZE] for i in range(0, len(lines), Debug.PROFILE_PAGE_SIZE))
+        )
+
+        for i, page in enumerate(pages, start=1):
+            page.set_footer(text="Page %i/%i" % (i, len(pages)))
+        return pages or [embed_message(title="Profile", description="Nothing was recorded", color=config.COLOR.INFO)]
+
+    @commands.command(
+        name="sample",
+        aliases=["sampler", "flamegraph"],
+        description="Samples the stacks of the whole bot for [seconds=10] seconds",
+        help="Starts a low overhead sampling profiler for all threads and asyncio tasks. The result is attached as collapsed " \
+             "stacks which can be turned into a flamegraph with `flamegraph.pl` or speedscope. At most %i seconds" % SAMPLE_MAX_SECONDS
+    )
+    async def sample(self, ctx, seconds: float = 10.0) -> None:
+        if self.sampler.running:
+            await ctx.send(embed=create_console_message(">> The sampling profiler is already running"))
+            return
+
+        seconds = min(max(seconds, 0.1), Debug.SAMPLE_MAX_SECONDS)
+        self.sampler.loop = asyncio.get_running_loop()
+
+        await ctx.send(embed=create_console_message(">> Sampling for %ss..." % seconds))
+        collapsed = await self.sampler.profile(seconds)
+
+        leaves = self.sampler.top_leaves()
+        await ctx.send(
+            embed=embed_message(
+                title="Sampling profile",
+                description="%i samples in %ss. Most sampled functions:\n```\n%s```" % (
+                    self.sampler.samples, seconds,
+                    "\n".join("%6i  %s" % (count, name) for name, count in leaves)[:3900] or "Nothing sampled"
+                ),
+                color=config.COLOR.INFO
+            ),
+            file=discord.File(io.BytesIO(collapsed.encode("utf-8")), filename="profile.collapsed")
+        )
+
+    @commands.command(
+        name="isolated",
+        aliases=["iso", "sandbox"],
+        description="Runs a in discord written program in a separate process",
+        help="Works like `debug`, but the program runs in a worker process with a time limit of %ss and a memory limit " \
+             "of %iMB, so it cannot block the bot. `bot`, `ctx` and the other live objects are not available there. " \
+             "Only bot owners can use it" % (
+                 SANDBOX_TIMEOUT, SANDBOX_MEMORY_LIMIT // 1024 ** 2
+             )
+    )
+    # the worker has full builtins and may read files, the restrictions of `debug` do not apply there
+    @commands.is_owner()
+    async def isolated(self, ctx, *, prgm: str) -> None:
+        code = await self.get_code(ctx, prgm)
+        if code is None:
+            return
+
+        console = ConsoleBuffer(ctx.channel, ctx.author)
+
+        async def send_output(text: str) -> None:
+            console.write(text)
+
+        try:
+            kind, value = await self.sandbox.run(code, send_output)
+        finally:
+            await console.close()
+
+        if kind == "result":
+            await ctx.send(
+                embed=embed_message(
+                    title="Console output",
+                    description="```py\n" + value[:1991] + "```",
+                    color="teal",
+                    author=self.bot.user
+                ),
+                file=discord.File(io.BytesIO(value.encode("utf-8")), filename="result.txt") if len(value) > 1991 else None
+            )
+        else:
+            await ctx.send(embed=embed_message(
+                title="Timeout" if kind == "timeout" else "An exception occured",
+                description="```py\n" + value[-1991:] + "```",
+                color=config.COLOR.ERROR,
+                author=self.bot.user
+            ))
+
+    @staticmethod
+    def normalize_prgm(prgm: str) -> str:
+        """Returns the program of the message without the code block, it is compiled and hashed as it is"""
+        prgm = parse_prgm(prgm).strip("` ")
+
+        # removes discord syntax highlighting if it exists
+        if prgm.split("\n")[0] == "py" or prgm.split("\n")[0] == "python":
+            prgm = "\n".join(prgm.split("\n")[1:])
+        return prgm
+
+    async def compile_prgm(self, ctx, prgm: str) -> Optional[CodeType]:
+        """
+        Checks the program for restricted access and compiles it into a module defining `Debug.FN_NAME`
+        @param prgm: the program returned by `Debug.normalize_prgm`
+        """
+        try:
+            scan = CodeScanner(prgm)
+        except (tokenize.TokenError, SyntaxError) as e:
+            await ctx.send(embed=embed_error(error=e))
+            return None
+
+        if ctx.author.id not in config.OWNER_IDS:
+            # prevents using the TOKEN in your code if you are not owner
+            # importing the token with `import config.TOKEN` and `from config import TOKEN` are restricted as well
+            if scan.imports_module("builtins"):
+                await ctx.send(embed=embed_message(
+                    title="Warning",
+                    description="Due to saftey from the bot token which is restricted to bot owner there are functions restricted.\n" \
+                                "That's why you don't need to import the builtins module. You are sooooooo ein Idiot <@%s>\n" % ctx.author.id,
+                    color=config.COLOR.WARNING,
+                    author=self.bot.user
+                ))
+                return None
+
+            # all imports which can result in problems for token safety
+            if (scan.uses_attribute("config.TOKEN")
+                or scan.string_contains(config.file_path)
+                or scan.imports_module("config")
+                or scan.uses_attribute("config.config_file_path")
+                or scan.string_contains("token", lower=True)
+                or scan.imports_module("os")
+            ):
+                await ctx.send(embed=embed_message(
+                    title="Warning",
+                    description="Due to saftey from the bot token which is restricted to bot owner there are functions restricted.\n" \
+                                "Please don't import the json library, config vars or call the open functions",
+                    color=config.COLOR.WARNING,
+                    author=self.bot.user
+                ))
+                return None
+
+        # add a layer of indentation
+        prgm = "\n".join(["  " + l for l in prgm.splitlines()])
+
+        # wrap in async def body
+        body = f"async def {Debug.FN_NAME}():\n{prgm}"
+
+        try:
+            parsed = ast.parse(body, mode="exec")
+        except Exception as e:
+            await ctx.send(embed=embed_error(error=e))
+            return None
+      
+        body = parsed.body[0].body  # type: ignore
+
+        insert_ast_returns(body)
+        # assigned names are kept in the session of the developer
+        insert_ast_globals(body)
+
+        return compile(parsed, filename="<ast>", mode="exec")
+
+    @commands.command(
+        name="debug_cache",
+        aliases=["dcache"],
+        description="Shows the statistics of the compiled code cache of the debug command or clears it"
+    )
+    async def debug_cache(self, ctx, action: Optional[str] = None):
+        if action == "clear":
+            self.code_cache.clear()
+
+        stats = self.code_cache.stats()
+        await ctx.send(embed=create_console_message(
+            ">> Cached: %(size)i/%(maxsize)i\n>> Hits: %(hits)i\n>> Misses: %(misses)i\n>> Hit rate: %(hit_rate).1f%%" % stats
+        ))
+
+    @commands.command(
+        name="stats",
+        aliases=["metrics"],
+        description="Shows the collected metrics, optionally only those starting with [prefix]",
+        help="Histograms are shown with their count, average and the estimated 50th and 95th percentile in ms, " \
+             "counters and gauges with their value"
+    )
+    async def stats(self, ctx, prefix: str = ""):
+        lines = []
+        for name, metric in sorted(metrics.REGISTRY.metrics.items()):
+            if not name.startswith(prefix):
+                continue
+
+            if isinstance(metric, metrics.Histogram):
+                for key, total, count in sorted(metric.totals()):
+                    lines.append("%s%s\n  n=%i avg=%.1fms p50<=%.0fms p95<=%.0fms" % (
+                        name, metrics.format_labels(key), count, total / count * 1000,
+                        metric.quantile(0.5, key) * 1000, metric.quantile(0.95, key) * 1000
+                    ))
+            else:
+                lines.extend("%s %g" % (sample, value) for sample, value in metric.samples())
+
+        pages = [
+            create_console_message("\n".join(lines[i:i + Debug.STATS_PAGE_SIZE])[:4000])
+            for i in range(0, len(lines), Debug.STATS_PAGE_SIZE)
+        ] or [create_console_message(">> Nothing was recorded yet")]
+        for i, page in enumerate(pages, start=1):
+            page.set_footer(text="Page %i/%i" % (i, len(pages)))
+
+        await send_pages(self.bot, ctx.channel, pages, user=ctx.author)
+
+    @commands.command(
+        name="lag",
+        aliases=["stalls", "watchdog"],
+        description="Shows where the event loop was blocked the longest",
+        help="The watchdog captures the stack of the event loop's thread whenever the loop is blocked for longer than " \
+             "the threshold. The stalls are grouped by the innermost function of the bot and the sampled stacks are attached"
+    )
+    async def lag(self, ctx):
+        watchdog = loop_watchdog.WATCHDOG
+        if watchdog is None or not watchdog.running:
+            await ctx.send(embed=create_console_message(">> The loop watchdog is not running"))
+            return
+
+        spots = watchdog.top()
+        await ctx.send(
+            embed=embed_message(
+                title="Event loop stalls",
+                description="Stalls longer than %sms, by total blocked time:\n```\n%s```" % (
+                    watchdog.threshold * 1000,
+                    "\n".join(
+                        "%4ix %8.0fms (max %6.0fms)  %s" % (s.count, s.total * 1000, s.max * 1000, s.name) for s in spots
+                    )[:3900] or "No stalls"
+                ),
+                color=config.COLOR.INFO
+            ),
+            file=discord.File(io.BytesIO(watchdog.collapsed().encode("utf-8")), filename="stalls.collapsed") if spots else None
+        )
+
+    @commands.command(
+        name="errors",
+        aliases=["err"],
+        description="Shows the reported errors or the latest traceback of one",
+        help="Errors are grouped by their type and the frames they were raised through. Without an argument the groups " \
+             "are listed, with a fingerprint (or its start) the latest traceback of it is attached, `last` shows the latest error"
+    )
+    async def errors(self, ctx, fingerprint: Optional[str] = None):
+        reporter = error_reports.REPORTER
+
+        if fingerprint is None:
+            lines = [
+                "%s %5ix  %s  %s: %s" % (
+                    r.fingerprint, r.count, time.strftime("%d.%m. %H:%M:%S", time.localtime(r.last_seen)),
+                    r.type_name, r.message[:60]
+                )
+                for r in reporter.summary()
+            ]
+            await ctx.send(embed=embed_message(
+                title="Errors",
+                description="```\n%s```" % ("\n".join(lines)[:3900] or "No errors"),
+                color=config.COLOR.INFO
+            ))
+            return
+
+        trace = reporter.latest_trace("" if fingerprint == "last" else fingerprint)
+        if trace is None:
+            await ctx.send(embed=create_console_message(
+                ">> No traceback of '%s' in the last %i errors" % (fingerprint, reporter.recent.maxlen)
+            ))
+            return
+
+        await ctx.send(
+            embed=create_console_message(">> Latest traceback of '%s'" % fingerprint),
+            file=discord.File(io.BytesIO(trace.encode("utf-8")), filename="traceback.txt")
+        )
+
+    @commands.command(
+        name="session",
+        aliases=["repl"],
+        description="Shows the variables of your debug session or resets it with `reset`",
+        help="Variables assigned by `debug` programs are kept in a session per developer, `_` is the last result. " \
+             "`session reset` starts with a fresh namespace"
+    )
+    async def session(self, ctx, action: Optional[str] = None):
+        session = self.sessions.get(ctx.author.id)
+
+        if action == "reset":
+            self.sessions.pop(ctx.author.id, None)
+            await ctx.send(embed=create_console_message(">> Your debug session was reset"))
+            return
+
+        if session is None:
+            await ctx.send(embed=create_console_message(">> You have no debug session"))
+            return
+
+        user_vars = session.user_vars()
+        await ctx.send(embed=create_console_message(
+            (">> %i variable(s)\n" % len(user_vars) + "\n".join(
+                ">> %s: %s" % (k, type(v).__name__) for k, v in sorted(user_vars.items())
+            ))[:1990]
+        ))
+
     @commands.command(
         name="restart",
         aliases=["relaod"],
-        description="Disconnects the bot and stops and then refreshes itself"
+        description="Disconnects the bot and restarts the process",
+        help="The state of the cogs is saved before and restored by the new process, so caches stay warm"
     )
     @commands.is_owner()
     async def restart(self, ctx):
+        count = restart.save_snapshot(self.bot)
+        await ctx.send(embed=create_console_message(">> Saved %i attribute(s), restarting..." % count))
+
+        self.sandbox.close()
         await self.bot.close()
         logging.info("Disconnected bot from discord")
-        self.bot.run(config.TOKEN)
-        logging.info("Reconnected to discord")
+        restart.exec_self()
 
     @commands.command(
         name="ping",
@@ -5,12 +5,13 @@ from datetime import datetime
 import aiohttp
 import config
 import discord
-from bs4 import BeautifulSoup
-from bs4 import Tag as HTMLTag
-from discord.embeds import EmptyEmbed
 from discord.ext import commands, tasks
 from errors import *
 from functions import *
+import metrics
+import outbound
+import parsing
+from storage import STORAGE
 
 
 class GMO_News(commands.Cog):
@@ -25,8 +26,19 @@ class GMO_News(commands.Cog):
         commands.Cog.__init__(self)
         self.bot = bot
         self.gmo_news_loop.start()
+        config.SERVICE.subscribe(self.on_config_change)
 
+    def cog_unload(self):
+        self.gmo_news_loop.cancel()
+        config.SERVICE.unsubscribe(self.on_config_change)
+
+    def on_config_change(self, old: config.ConfigSnapshot, new: config.ConfigSnapshot) -> None:
+        if old.INTERVAL != new.INTERVAL:
+            self.gmo_news_loop.change_interval(seconds=new.INTERVAL)
+
+    # only the first interval, on_config_change follows config.INTERVAL
     @tasks.loop(seconds=config.INTERVAL)
+    @metrics.timed(metrics.LOOP_SECONDS, loop="gmo_news")
     async def gmo_news_loop(self):
         await self.bot.wait_until_ready()
 
@@ -37,7 +49,7 @@ class GMO_News(commands.Cog):
         news_channel = self.bot.get_channel(config.NEWS_CHANNEL_ID)
 
         if news_channel is None:
-            logging.error("Getting channel with id '%s' failed" % config.NEWS_CHANNEL_ID)
+            logging.error("Getting channel with id '%s' failed", config.NEWS_CHANNEL_ID)
             return
 
         for article in reversed(articles):
@@ -46,22 +58,22 @@ class GMO_News(commands.Cog):
                     content = "<@&%s>" % config.ROLES["gmo"]["id"] if i == 0 else None
                     
                     if isinstance(e, discord.Embed):
-                        await news_channel.send(content=content, embed=e)
+                        await outbound.send(news_channel, outbound.Priority.NEWS, content=content, embed=e)
                     else:
-                        await news_channel.send(content=content, embed=e[0], file=e[1])
+                        await outbound.send(news_channel, outbound.Priority.NEWS, content=content, embed=e[0], file=e[1])
 
             except Exception as e:
                 await report_error(self.bot, e, logging.ERROR)
-                await news_channel.send(article[0].url)
+                await outbound.send(news_channel, outbound.Priority.NEWS, content=article[0].url)
 
-            logging.info("Sent gmo news article '%s'" % article[0].title)
+            logging.info("Sent gmo news article '%s'", article[0].title)
 
             await self.save_article(article)
 
             logging.info("Saved article successfully")
 
         if len(articles):
-            logging.info("Sent %s gmo news article" % len(articles))
+            logging.info("Sent %s gmo news article", len(articles))
 
     @gmo_news_loop.before_loop
     async def before_gmo_news_loop(self):
@@ -89,126 +101,61 @@ class GMO_News(commands.Cog):
         version = article[-1]._fields[-1]["value"]
         link = article[0].url
 
-        saved_article = json.load(open(config.NEWS_DATA_FILE_PATH))["gmo"]
-
-        if link in [d["link"] for d in saved_article]:
-            save_json_on_path(
-                file=config.NEWS_DATA_FILE_PATH,
-                path="gmo/%i/version" % [d["link"] for d in saved_article].index(link),
-                value=version
-            )
-        else:
-            save_json_on_path(
-                file=config.NEWS_DATA_FILE_PATH,
-                path="gmo",
-                value={
+        def update(jsn: dict[str, Any]) -> None:
+            saved_article = jsn["gmo"]
+            links = [d["link"] for d in saved_article]
+            if link in links:
+                saved_article[links.index(link)]["version"] = version
+            else:
+                saved_article.append({
                     "version": version,
                     "link": link
-                }
-            )
+                })
+
+        await STORAGE.update(config.NEWS_DATA_FILE_PATH, update)
 
     async def get_articles(self) -> list:
         async with aiohttp.ClientSession() as session:
             async with session.get(config.GMO_NEWS_URL) as r:
                 gmo_html = await r.text()
 
-        soup = BeautifulSoup(gmo_html, "html.parser")
         formatted_articles: list = []
-        
-        for article in soup.find_all(class_="newseintrag"):
-            if not await self.article_was_sent(repr(article)):
+        saved_articles = (await STORAGE.load(config.NEWS_DATA_FILE_PATH))["gmo"]
+
+        for article in await parsing.run(parsing.find_gmo_articles, gmo_html):
+            if not await self.article_was_sent(article, saved_articles):
                 formatted_articles.append(
-                    await self.format_article(repr(article))
+                    await self.format_article(article["html"])
                 )
 
         return formatted_articles
 
-    async def article_was_sent(self, article: str) -> bool:
-        soup = BeautifulSoup(article, "html.parser")
-        link = soup.find(class_="titel").find("a", href=True)["href"]  # type: ignore
-
-        jsn = json.load(open(config.NEWS_DATA_FILE_PATH, "r", encoding="utf-8"))["gmo"]
-
-        for element in jsn:
-            if element["link"] == link:
-                date = soup.find(class_="datum")
-                if date is None:
+    async def article_was_sent(self, article: dict[str, Any], saved_articles: list[dict[str, str]]) -> bool:
+        for element in saved_articles:
+            if element["link"] == article["link"]:
+                if article["date"] is None:
                     raise NewsError("Date could not be read from a NoneType-obj")
-                if element["version"] == date.text:  # type: ignore
+                if element["version"] == article["date"]:
                     return True
 
         return False
 
     async def format_article(self, html: str) -> list:
-        soup = BeautifulSoup(html, "html.parser")
-        article_div = soup.find("div")
-
-        if article_div is None:
-            raise ElementNotFound("div element from gmo article was not found")
-        
-        embeds: list = []
-        at_embed: int = 0
-        child: HTMLTag
-        for i, child in enumerate(article_div.children, start=0):  # type: ignore
-            if i <= 1 or child.name is None:
-                continue
-            
-            if at_embed == len(embeds):
-                embeds.append(discord.Embed(title=config.EMPTY_CHAR))
-            
-            in_child = [x for x in child.children if x.name]  # type: ignore
-            
-            inner_child = ""  # type: ignore
-            if len(in_child) == 1:
-                inner_child: HTMLTag = in_child[0]  # type: ignore
-
-            if getattr(inner_child, "name", "") in GMO_News.NO_TEXT_TAG:
-                if inner_child.name == "img":
-                    embeds.append(discord.Embed(
-                        title=v if (v := inner_child.attrs.get("alt")) else inner_child.attrs["src"],
-                    ).set_image(url=inner_child.attrs["src"]))
-                elif inner_child.name == "video":
-                    embeds[-1].add_field(
-                        name=config.EMPTY_CHAR,
-                        value="[Video](%s)" % inner_child.attrs["src"],
-                        inline=False
-                    )
+        embeds = [
+            discord.Embed.from_dict(e)
+            for e in await parsing.run(parsing.render_gmo_article, html, tuple(GMO_News.NO_TEXT_TAG))
+        ]
 
-            else:
-                fp = html_to_dc_md(repr(child)) 
-                if not fp.strip():
-                    continue
-
-                elif embeds[at_embed].description == EmptyEmbed:
-                    embeds[at_embed].description = skip(fp, 2000)
-                else:
-                    embeds[at_embed].add_field(name=config.EMPTY_CHAR, value=skip(fp, 1024), inline=False)
-        try:
-            embeds[0].title = article_div.find("p", class_="titel").find("a", text=True).text  # type: ignore
-        except Exception as e:
-            embeds[0].title = "Error: " + str(e)
-
-        embeds[0].url = article_div.find("p", class_="titel").find("a", href=True)["href"]  # type: ignore
-        if isinstance(embeds[-1], list):
-            embeds[-1][0].set_footer(
-                text=config.GMO_NEWS_AUTHOR[0],
-                icon_url=config.GMO_NEWS_AUTHOR[1],
-            )
-            embeds[-1][0].timestamp = datetime.utcnow()
-        else:            
-            embeds[-1].set_footer(
-                text=config.GMO_NEWS_AUTHOR[0],
-                icon_url=config.GMO_NEWS_AUTHOR[1],
-            )
-            embeds[-1].timestamp = datetime.utcnow()
+        embeds[-1].set_footer(
+            text=config.GMO_NEWS_AUTHOR[0],
+            icon_url=config.GMO_NEWS_AUTHOR[1],
+        )
+        embeds[-1].timestamp = datetime.utcnow()
 
         # add color
         for e in embeds:
-            if isinstance(e, list):
-                e[0].color = config.COLOR.GREEN
-            else:
-                e.color = config.COLOR.GREEN
-            
+            e.color = config.COLOR.GREEN
+
         return embeds
 
     @commands.command(
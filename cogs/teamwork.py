@@ -1,15 +1,22 @@
+import asyncio
+import contextlib
+import csv
+import io
 import json
 import logging
-from re import fullmatch
+import time
+from re import findall, fullmatch
 from string import ascii_letters, ascii_lowercase, digits, punctuation
 
 from discord.errors import HTTPException
 
 import config
 import discord
-from discord.ext import commands
+from classes import GuildSnapshot, Team
+from discord.ext import commands, tasks
 from errors import *
 from functions import *
+from storage import STORAGE, read_json
 
 
 class Teamwork(commands.Cog):
@@ -19,13 +26,117 @@ class Teamwork(commands.Cog):
     NAME_EMOJI = "✏️"
 
     MAX_GROUPS = 15
+    BULK_MAX_TEAMS = 100
+    BULK_CONCURRENCY = 4
+    BULK_STATUS_INTERVAL = 2.0
+    RECONCILE_INTERVAL = 1800
+    # kept when the extension is hot reloaded
+    PERSISTENT_STATE = ("group_data", "locks", "snapshot", "flagged")
+    # kept over a restart, the guild snapshot holds discord objects and is fetched again
+    SNAPSHOT_STATE = ("group_data", "flagged")
     COLOR = config.COLOR.PURPLE
     CATEGORY_ID = 866797990857670707
 
     def __init__(self, bot: commands.Bot) -> None:
         commands.Cog.__init__(self)
         self.bot = bot
-        self.group_data: dict[str, list[dict[str, Any]]] = {}
+        self.group_data: dict[str, list[Team]] = self.load_group_data()
+        self.locks: dict[int, asyncio.Lock] = {}
+        self.snapshot: Optional[GuildSnapshot] = None
+        self.flagged: set[str] = set()
+        self.reconcile_loop.start()
+
+    def cog_unload(self):
+        self.reconcile_loop.cancel()
+
+    @tasks.loop(seconds=RECONCILE_INTERVAL)
+    async def reconcile_loop(self):
+        category = self.bot.get_channel(Teamwork.CATEGORY_ID)
+        if category is None:
+            logging.warning("Failed to get team category with id '%s'", Teamwork.CATEGORY_ID)
+            return
+
+        guild: discord.Guild = category.guild
+        # teams registered after this point may be missing in the snapshot, so they are not judged by it
+        known = {team for teams in self.group_data.values() for team in teams}
+        roles, channels = await asyncio.gather(guild.fetch_roles(), guild.fetch_channels())
+        self.snapshot = GuildSnapshot(guild.id, roles, channels)
+
+        removed, flagged = await self.reconcile(self.snapshot, known)
+        new_flagged = flagged - self.flagged
+        self.flagged = flagged
+
+        logging.info("Reconciled teams: %i removed, %i flagged", len(removed), len(flagged))
+        if not removed and not new_flagged:
+            return
+
+        channel = self.bot.get_channel(config.LOG_CHANNEL_ID)
+        if channel is None:
+            logging.warning("Could not find channel with id %s", config.LOG_CHANNEL_ID)
+            return
+
+        fields = []
+        if removed:
+            fields.append(("Removed (role and channel deleted)", '\n'.join(removed)[:1024], False))
+        if new_flagged:
+            fields.append(("Needs attention", '\n'.join(sorted(new_flagged))[:1024], False))
+
+        await channel.send(embed=embed_message(
+            title="Teamwork reconciliation",
+            description="The teamwork file and the server were out of sync",
+            fields=fields,
+            color=config.COLOR.WARNING
+        ))
+
+    @reconcile_loop.before_loop
+    async def before_reconcile_loop(self):
+        await self.bot.wait_until_ready()
+
+    @reconcile_loop.error
+    async def reconcile_loop_error(self, error: BaseException):
+        await report_error(self.bot, error, logging.ERROR)
+
+    async def reconcile(self, snapshot: GuildSnapshot, known: Optional[set[Team]] = None) -> tuple[list[str], set[str]]:
+        """
+        Diffs the team registry against the snapshot. Teams without role and channel are removed, everything else is flagged
+        @param known: the teams registered before the snapshot was taken, the others are skipped. None checks all teams
+        """
+        removed: list[str] = []
+        flagged: set[str] = set()
+
+        for owner_id in list(self.group_data):
+            async with self.get_lock(int(owner_id)):
+                # the snapshot is taken without the locks, the owner's teams may have changed while waiting
+                teams = self.group_data.get(owner_id, [])
+                removed_before = len(removed)
+                for team in list(teams):
+                    if known is not None and team not in known:
+                        continue
+
+                    role = snapshot.get_role(team.role_name)
+                    channel = snapshot.get_channel(team.channel_id)
+
+                    if role is None and channel is None:
+                        teams.remove(team)
+                        removed.append("%s (<@%s>)" % (team.name, owner_id))
+                    elif role is None:
+                        flagged.add("%s (<@%s>): role missing" % (team.name, owner_id))
+                    elif channel is None:
+                        flagged.add("%s (<@%s>): channel missing" % (team.name, owner_id))
+
+                if len(removed) > removed_before:
+                    await self.save_group_data()
+
+        registered_channels = {team.channel_id for teams in self.group_data.values() for team in teams}
+        for channel in snapshot.channels.values():
+            if (
+                isinstance(channel, discord.TextChannel)
+                and channel.category_id == Teamwork.CATEGORY_ID
+                and channel.id not in registered_channels
+            ):
+                flagged.add("<#%i>: channel of no registered team" % channel.id)
+
+        return removed, flagged
 
     @commands.group(
         name="tm",
@@ -64,7 +175,7 @@ class Teamwork(commands.Cog):
 
         for group in self.group_data[str(ctx.author.id)]:
             embed.add_field(
-                name=group["name"],
+                name=group.name,
                 value=await self.get_group_summary(group),
                 inline=False
             )
@@ -95,13 +206,13 @@ class Teamwork(commands.Cog):
                 description="You need to give a name to your team",
                 color=config.COLOR.ERROR
             ))
-        group_members: list[str] = ["<@!%s>" % ctx.author.id]
+        group_members: list[int] = [ctx.author.id]
         description: str = "_No description_"
 
         for member in who_as_mentions:
             member = member.strip()
-            if member.strip(ascii_letters + punctuation).isdigit():
-                group_members.append(member)
+            if (member_id := member.strip(ascii_letters + punctuation)).isdigit() and int(member_id) not in group_members:
+                group_members.append(int(member_id))
 
         reactions = await ask_by_reaction(
             self.bot,
@@ -115,7 +226,7 @@ class Teamwork(commands.Cog):
                         	f"\n{Teamwork.DESCRIPTION_EMOJI}: Edit description"
                             f"\n\nIf no is selected the group will be added using the shown values",
                 fields=[
-                    ("Current member of team", ', '.join(group_members), False),
+                    ("Current member of team", ', '.join("<@!%i>" % m for m in group_members), False),
                     ("Current description", description, False)
                 ],
                 color=Teamwork.COLOR,
@@ -154,49 +265,27 @@ class Teamwork(commands.Cog):
             else:
                 description = reply.content
 
-        guild: discord.Guild = ctx.guild
-
-        role = await guild.create_role(name=(name + str(ctx.author.id)), reason="Command `-tm create ...` was called by %s" % ctx.author.id)
-
-        channel = await guild.create_text_channel(
-            name=name,
-            overwrites={
-                guild.default_role: discord.PermissionOverwrite(view_channel=False),
-                guild.me: discord.PermissionOverwrite(
-                    view_channel=True, 
-                    send_messages=True,
-                    read_messages=True,
-                    add_reactions=True
-                ),
-                guild.get_role(role.id): discord.PermissionOverwrite(
-                    view_channel=True,
-                    read_message_history=True,
-                    read_messages=True,
-                    send_messages=True,
-                    attach_files=True,
-                    add_reactions=True 
-                )
-            },
-            category=get_category(guild.categories, id=Teamwork.CATEGORY_ID),
-            topic=description
-        )
+        async with self.get_lock(ctx.author.id):
+            # a concurrent command of the same owner may have created the team while waiting for the reactions
+            if self.has_group(ctx.author.id, name):
+                await ctx.send(embed=embed_message(
+                    title="Team '%s' does already exist" % name,
+                    description="<@%i> Please try another name or delete/edit the current team '%s'" % (ctx.author.id, name),
+                    color=config.COLOR.WARNING
+                ))
+                return
 
-        for m_id in [int(x.strip(ascii_letters + punctuation)) for x in group_members]:
-            m: Optional[discord.Member] = await guild.fetch_member(m_id)
-            if m is not None:
-                await m.add_roles(role, reason="You were added to the team %s by %s" % (name, ctx.author))
-            else:
-                logging.debug("Member with id %s was not found" % m_id)
+            _, channel = await self.provision_team(ctx.guild, ctx.author.id, name, group_members, description)
 
-        await self.add_group_in_file(
-            name=name,
-            members=group_members,
-            description=description,
-            owner_id=ctx.author.id,
-            channel_id=channel.id
-        )
+            await self.add_team(Team(
+                name=name,
+                owner_id=ctx.author.id,
+                channel_id=channel.id,
+                members=group_members,
+                description=description
+            ))
 
-        logging.debug("Added team %s" % name)
+            logging.debug("Added team %s", name)
 
         await ctx.send(embed=embed_message(
             title="Team '%s'" % name,
@@ -204,12 +293,129 @@ class Teamwork(commands.Cog):
             color=Teamwork.COLOR
         ))
 
+    @tm.command(
+        name="bulk",
+        aliases=["import", "many"],
+        description="Creates many teams/groups at once from an attached CSV or JSON file",
+        help="Attach a `.csv` file with the columns `name`, `members`, `description` and `owner` or a `.json` file with " \
+             "a list of objects using the same keys. `members` are mentions or ids separated by spaces, `description` and " \
+             "`owner` are optional. Creating teams for other owners requires the *Manage Roles* permission. " \
+             "The whole file is validated first and if creating a team fails the others are deleted again, so either all " \
+             "teams are created or none"
+    )
+    @commands.guild_only()
+    async def tm_bulk(self, ctx):
+        if not ctx.message.attachments:
+            await ctx.send(embed=embed_message(
+                title="No file attached",
+                description="Please attach a `.csv` or `.json` file describing the teams to the command message",
+                color=config.COLOR.ERROR
+            ))
+            return
+
+        attachment: discord.Attachment = ctx.message.attachments[0]
+        try:
+            rows = self.parse_bulk_file(attachment.filename, (await attachment.read()).decode("utf-8"))
+        except (TeamCreationError, UnicodeDecodeError, ValueError) as e:
+            await ctx.send(embed=embed_message(
+                title="Invalid file",
+                description="The file '%s' could not be read: %s" % (attachment.filename, e),
+                color=config.COLOR.ERROR
+            ))
+            return
+
+        # the owners decide the locks, so missing ones are filled in before
+        self.resolve_bulk_owners(rows, ctx.author)
+        owner_ids = sorted({team.owner_id for team in rows})
+
+        async with contextlib.AsyncExitStack() as stack:
+            # sorted acquisition, so two bulk imports can never deadlock each other
+            for owner_id in owner_ids:
+                await stack.enter_async_context(self.get_lock(owner_id))
+
+            errors = self.validate_bulk_teams(rows, ctx.author)
+            if errors:
+                await ctx.send(embed=embed_message(
+                    title="Bulk creation cancelled",
+                    description="No team was created because the file contains %i error(s):\n%s" % (
+                        len(errors), "\n".join(errors)[:1900]
+                    ),
+                    color=config.COLOR.ERROR
+                ))
+                return
+
+            status: discord.Message = await ctx.send(embed=self.get_bulk_status(0, 0, len(rows)))
+            semaphore = asyncio.Semaphore(Teamwork.BULK_CONCURRENCY)
+            done: list[tuple[Team, discord.Role, discord.TextChannel]] = []
+            failed: list[str] = []
+            last_edit = 0.0
+
+            async def provision(team: Team) -> None:
+                nonlocal last_edit
+                async with semaphore:
+                    try:
+                        role, channel = await self.provision_team(
+                            ctx.guild, team.owner_id, team.name, team.members, team.description
+                        )
+                    except HTTPException as e:
+                        logging.warning("Bulk creation of team '%s' failed: %s", team.name, e)
+                        failed.append("%s: %s" % (team.name, e.text or e.status))
+                        raise
+                    done.append((team, role, channel))
+
+                # edit the single status message at most every few seconds to keep the edit bucket free
+                if time.monotonic() - last_edit >= Teamwork.BULK_STATUS_INTERVAL:
+                    last_edit = time.monotonic()
+                    try:
+                        await status.edit(embed=self.get_bulk_status(len(done), len(failed), len(rows)))
+                    except HTTPException:
+                        pass
+
+            try:
+                results = await asyncio.gather(*(provision(team) for team in rows), return_exceptions=True)
+            except BaseException:
+                await self.rollback_bulk_teams(done)
+                raise
+
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                # all or none, the teams created so far are deleted again
+                await self.rollback_bulk_teams(done)
+                unexpected = next((e for e in errors if not isinstance(e, HTTPException)), None)
+                if unexpected is not None:
+                    raise unexpected
+
+                await status.edit(embed=self.get_bulk_status(
+                    0, len(failed), len(rows),
+                    fields=[
+                        ("Failed", '\n'.join(failed)[:1024] or "_None_", False),
+                        ("Rolled back", "No team was created, the %i teams created before were deleted again" % len(done), False)
+                    ]
+                ))
+                return
+
+            for team, _, channel in done:
+                team.channel_id = channel.id
+                await self.add_team(team, save=False)
+            await self.save_group_data()
+
+        logging.info("Bulk created %i teams for %s", len(done), ctx.author)
+
+        await status.edit(embed=self.get_bulk_status(
+            len(done), 0, len(rows),
+            fields=[("Created", ' '.join("<#%i>" % channel.id for _, _, channel in done)[:1024] or "_None_", False)]
+        ))
+
     @tm.command(
         name="delete",
         aliases=["del", "remove"],
         description="Deletes a team/group"
     )
     async def tm_delete(self, ctx, name: str):
+        async with self.get_lock(ctx.author.id):
+            await self.delete_team(ctx, name)
+
+    async def delete_team(self, ctx, name: str) -> None:
         name = self.transform_to_dc_channel_name(name)
         if not self.has_group(ctx.author.id, name):
             await ctx.send(embed=embed_message(
@@ -218,25 +424,11 @@ class Teamwork(commands.Cog):
                 color=config.COLOR.ERROR
             ))
             return
-        
+    
         guild: discord.Guild = ctx.guild
-        role = await guild.fetch_roles()
-        for r in role:
-            if r.name == (name + str(ctx.author.id)):
-                await r.delete()
-                break
-        else:
-            await ctx.send(embed=embed_message(
-                title="Internal error",
-                description="Deleting team '%s' failed. Please contact <@%i>" % (name, config.OWNER_IDS[0]),
-                color=config.COLOR.ERROR
-            ))
-            return
-        
-        channels = await guild.fetch_channels()
-        team_json = await self.get_json_from_team(ctx.author.id, name)
+        team = await self.get_team(ctx.author.id, name)
 
-        if team_json is None:
+        if team is None:
             await ctx.send(embed=embed_message(
                 title="Internal error",
                 description="Deleting team '%s' failed. Please contact <@%i>" % (name, config.OWNER_IDS[0]),
@@ -244,13 +436,26 @@ class Teamwork(commands.Cog):
             ))
             return
 
-        for c in channels:
-            if c.id == team_json["channel_id"] and isinstance(c, discord.TextChannel):
-                await c.delete()
+        # a role or channel deleted by hand is no reason to keep the team registered
+        role = await self.find_team_role(guild, team.role_name)
+        if role is not None:
+            await role.delete()
+        else:
+            logging.warning("Role of team '%s' was already deleted", name)
+
+        channel = await self.find_team_channel(guild, team.channel_id)
+        if channel is not None:
+            await channel.delete()
+        else:
+            logging.warning("Channel of team '%s' was already deleted", name)
+
+        if self.snapshot is not None:
+            self.snapshot.forget_role(team.role_name)
+            self.snapshot.forget_channel(team.channel_id)
 
         await self.remove_team_from_json(ctx.author.id, name)
 
-        logging.debug("Deleted team '%s' from json" % name)
+        logging.debug("Deleted team '%s' from json", name)
         try:
             await ctx.send(embed=embed_message(
                 title="Deleted team",
@@ -260,7 +465,7 @@ class Teamwork(commands.Cog):
         except HTTPException:
             pass
 
-        logging.debug("Deleted team '%s' successfully" % name)
+        logging.debug("Deleted team '%s' successfully", name)
 
     @tm.command(
         name="edit",
@@ -357,7 +562,7 @@ class Teamwork(commands.Cog):
             ))
 
         if reactions[2]:
-            team = await self.get_json_from_team(ctx.author.id, name)
+            team = await self.get_team(ctx.author.id, name)
 
             if team is None:
                 await ctx.send(embed=embed_message(
@@ -378,7 +583,7 @@ class Teamwork(commands.Cog):
                     ),
                     (
                         "Current members",
-                        '\u0020'.join(team["members"]),
+                        '\u0020'.join(team.mentions),
                         False
                     )
                 ],
@@ -393,56 +598,62 @@ class Teamwork(commands.Cog):
                 ))
                 return
             
-            await ctx.send(embed=embed_message(
-                title="Editing team member",
-                description="This could take a while, so do not panic if a while does nothing happen",
-                color=config.COLOR.INFO
-            ))
-            
-            formatted_member_str = msg.content.replace(" ", "")
-            members_to_edit = []
-            member_str = ""
-            for c in formatted_member_str:
-                member_str += c
-                if c == ">":
-                    if member_str.startswith("<@!"):
-                        members_to_edit.append(member_str)
-                    
-                    member_str = ""
-            
-            removed = []
-            added = []
-            guild: discord.Guild = ctx.guild
-            role = await get_role(guild, name=team["name"] + str(ctx.author.id))
+            async with self.get_lock(ctx.author.id):
+                # the team could have been changed or deleted by another command while waiting for the message
+                team = await self.get_team(ctx.author.id, name)
+                if team is None:
+                    await ctx.send(embed=embed_message(
+                        title="Error",
+                        description="Team '%s' was not found or you are not the owner" % name,
+                        color=config.COLOR.RED
+                    ))
+                    return
 
-            if role is None:
-                await ctx.send(embed=embed_message(
-                    title="Error",
-                    description="Role not found. Please try again. If that not works contact <@%i>" % config.OWNER_IDS[0]
-                ))
-                return 
+                guild: discord.Guild = ctx.guild
+                role = await self.find_team_role(guild, team.role_name)
 
-            for m in members_to_edit:
-                member = await ctx.guild.fetch_member(m.strip(punctuation))
+                if role is None:
+                    await ctx.send(embed=embed_message(
+                        title="Error",
+                        description="Role not found. Please try again. If that not works contact <@%i>" % config.OWNER_IDS[0]
+                    ))
+                    return 
 
-                if str(ctx.author.id) in m:
+                mentioned = set(msg.raw_mentions)
+                if ctx.author.id in mentioned:
+                    mentioned.discard(ctx.author.id)
                     await ctx.send(embed=embed_message(
                         title="ERROR: You are owner",
                         description="You cannot remove yourself of your team.",
                         color=config.COLOR.ERROR
                     ))
-                elif m in team["members"]:
-                    removed.append(
-                        team["members"].pop(team["members"].index(m))
-                    )
-                    await remove_member_role(role, member)
-                else:
-                    team["members"].append(m)
-                    added.append(m)
-                    await add_member_role(role, member, reason="You were invited to the team '%s'" % name)
-            
-            with open(config.TEAMWORK_FILE, "w") as f:
-                f.write(json.dumps(self.group_data, indent=4, sort_keys=True))
+
+                # compute the whole diff first, so every affected member costs exactly one api call
+                to_remove = {m_id for m_id in mentioned if m_id in team}
+                to_add = mentioned - to_remove
+                resolved: dict[int, discord.Member] = {m.id: m for m in msg.mentions if isinstance(m, discord.Member)}
+
+                changes = [(m_id, False) for m_id in to_remove] + [(m_id, True) for m_id in to_add]
+                results = await asyncio.gather(
+                    *(self.apply_member_change(guild, role, resolved.get(m_id), m_id, add, name) for m_id, add in changes),
+                    return_exceptions=True
+                )
+
+                removed = []
+                added = []
+                for (m_id, add), result in zip(changes, results):
+                    if isinstance(result, BaseException):
+                        logging.warning("Changing member %s of team '%s' failed: %s", m_id, name, result)
+                        continue
+
+                    if add:
+                        team.add_member(m_id)
+                        added.append("<@!%i>" % m_id)
+                    else:
+                        team.remove_member(m_id)
+                        removed.append("<@!%i>" % m_id)
+
+                await self.save_group_data()
 
             fields = []
             sadded = ' '.join(added)
@@ -472,121 +683,270 @@ class Teamwork(commands.Cog):
                 color=config.COLOR.INFO
             ))
 
-    async def change_description(self, user_id: int, name: str, guild: discord.Guild, new_description: str):
-        teams = self.group_data[str(user_id)]
-        for team in teams:
-            if team["name"] == name:
-                team["description"] = new_description
-                channels = await guild.fetch_channels()
-
-                for channel in channels:
-                    if (
-                        isinstance(channel, discord.TextChannel)
-                        and channel.id == team["channel_id"]
-                    ):
-                        await channel.edit(topic=new_description)
-                        break
+    async def provision_team(self, guild: discord.Guild, owner_id: int, name: str, members: Iterable[int],
+        description: str = "_No description_"
+    ) -> tuple[discord.Role, discord.TextChannel]:
+        """
+        Creates the role and channel of a team and grants the role to all members. The team is not registered. If
+        anything fails, what was created already is deleted again
+        """
+        role = await guild.create_role(name=(name + str(owner_id)), reason="Command `-tm create ...` was called by %s" % owner_id)
+        channel = None
+        try:
+            channel = await self.create_team_channel(guild, role, name, description)
 
-                break
+            member_ids = list(members)
+            results = await asyncio.gather(
+                *(self.apply_member_change(guild, role, None, m_id, True, name) for m_id in member_ids),
+                return_exceptions=True
+            )
+            for m_id, result in zip(member_ids, results):
+                if isinstance(result, BaseException):
+                    logging.debug("Member with id %s was not found", m_id)
+        except BaseException:
+            await self.delete_team_resources(name, role, channel)
+            raise
 
-        with open(config.TEAMWORK_FILE, "w") as f:
-            f.write(json.dumps(self.group_data, indent=4, sort_keys=True))
+        return role, channel
 
-        logging.info("Changed description of team '%s' to \"%s\"" % (name, new_description))
-            
-    async def change_name(self, user_id: int, old_name: str, new_name: str, guild: discord.Guild):
-        teams = self.group_data[str(user_id)]
-        for team in teams:
-            if team["name"] == new_name:
-                raise TeamEditError("Cannot change name of team '%s' to '%s', because name already used in one of your teams" % (old_name, new_name))
+    async def create_team_channel(self, guild: discord.Guild, role: discord.Role, name: str, description: str) -> discord.TextChannel:
+        return await guild.create_text_channel(
+            name=name,
+            overwrites={
+                guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                guild.me: discord.PermissionOverwrite(
+                    view_channel=True, 
+                    send_messages=True,
+                    read_messages=True,
+                    add_reactions=True
+                ),
+                role: discord.PermissionOverwrite(
+                    view_channel=True,
+                    read_message_history=True,
+                    read_messages=True,
+                    send_messages=True,
+                    attach_files=True,
+                    add_reactions=True 
+                )
+            },
+            category=get_category(guild.categories, id=Teamwork.CATEGORY_ID),
+            topic=description
+        )
+
+    async def delete_team_resources(self, name: str, role: Optional[discord.Role], channel: Optional[discord.TextChannel]) -> None:
+        """Deletes the role and channel of a team which was not registered, failures are only logged"""
+        for obj in (channel, role):
+            if obj is None:
+                continue
+            try:
+                await obj.delete(reason="Creating the team '%s' was rolled back" % name)
+            except HTTPException as e:
+                logging.warning("Rolling back '%s' of team '%s' failed: %s", obj.name, name, e)
+
+    async def rollback_bulk_teams(self, created: list[tuple[Team, discord.Role, discord.TextChannel]]) -> None:
+        await asyncio.gather(*(self.delete_team_resources(team.name, role, channel) for team, role, channel in created))
+
+    def parse_bulk_file(self, filename: str, text: str) -> list[Team]:
+        """Reads the rows of a bulk file into unregistered teams. Values are only normalized here, see `validate_bulk_teams`"""
+        if filename.lower().endswith(".json") or text.lstrip().startswith("["):
+            rows = json.loads(text)
+            if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+                raise TeamCreationError("A json file needs to contain a list of objects")
+        else:
+            rows = list(csv.DictReader(io.StringIO(text)))
+
+        if not rows:
+            raise TeamCreationError("The file does not describe any team")
+        if len(rows) > Teamwork.BULK_MAX_TEAMS:
+            raise TeamCreationError("Not more than %i teams can be created at once" % Teamwork.BULK_MAX_TEAMS)
+
+        teams = []
+        for row in rows:
+            members = row.get("members") or ""
+            if isinstance(members, list):
+                members = " ".join(str(m) for m in members)
+            owner = str(row.get("owner") or "").strip(ascii_letters + punctuation + " ")
+
+            # owner id 0 marks a missing owner, it is filled in by the validation
+            teams.append(Team(
+                name=self.transform_to_dc_channel_name(str(row.get("name") or "")),
+                owner_id=int(owner) if owner.isdigit() else 0,
+                channel_id=0,
+                members=(int(m_id) for m_id in findall(r"[0-9]+", str(members))),
+                description=str(row.get("description") or "").strip() or "_No description_"
+            ))
+        return teams
+
+    @staticmethod
+    def resolve_bulk_owners(teams: list[Team], author: discord.Member) -> None:
+        """Fills in missing owners with the author and makes the owners members of their teams"""
         for team in teams:
-            if team["name"] == old_name:
-                team["name"] = new_name
+            if not team.owner_id:
+                team.owner_id = author.id
+            team.add_member(team.owner_id)
+
+    def validate_bulk_teams(self, teams: list[Team], author: discord.Member) -> list[str]:
+        """Validates all teams in one pass and returns the errors. The owners need to be resolved first"""
+        errors: list[str] = []
+        seen: set[tuple[int, str]] = set()
+        counts: dict[int, int] = {}
+
+        for line, team in enumerate(teams, start=1):
+            owner_id = team.owner_id
+
+            if not team.name:
+                errors.append("Team %i: no valid name given" % line)
+            elif (owner_id, team.name) in seen or self.has_group(owner_id, team.name):
+                errors.append("Team %i: '%s' does already exist for <@%i>" % (line, team.name, owner_id))
+            seen.add((owner_id, team.name))
+
+            if owner_id != author.id and not author.guild_permissions.manage_roles:
+                errors.append("Team %i: you need the *Manage Roles* permission to create teams for <@%i>" % (line, owner_id))
+
+            counts[owner_id] = counts.get(owner_id, len(self.group_data.get(str(owner_id), []))) + 1
+            if counts[owner_id] == Teamwork.MAX_GROUPS + 1:
+                errors.append("Team %i: <@%i> would have more than %i teams" % (line, owner_id, Teamwork.MAX_GROUPS))
+
+        return errors
+
+    def get_bulk_status(self, done: int, failed: int, total: int, fields=()) -> discord.Embed:
+        return embed_message(
+            title="Bulk team creation",
+            description="%s %i/%i teams created, %i failed" % (
+                config.CHECK_MARK if done + failed == total else "\u23F3", done, total, failed
+            ),
+            fields=fields,
+            color=Teamwork.COLOR
+        )
 
-                channels = await guild.fetch_channels()
+    async def apply_member_change(self, guild: discord.Guild, role: discord.Role, member: Optional[discord.Member],
+        member_id: int, add: bool, team_name: str
+    ) -> None:
+        if member is None:
+            member = guild.get_member(member_id) or await guild.fetch_member(member_id)
 
-                for channel in channels:
-                    if (
-                        isinstance(channel, discord.TextChannel)
-                        and channel.id == team["channel_id"]
-                    ):
+        if add:
+            await add_member_role(role, member, reason="You were invited to the team '%s'" % team_name)
+        else:
+            await remove_member_role(role, member, reason="You were removed from the team '%s'" % team_name)
+
+    async def change_description(self, user_id: int, name: str, guild: discord.Guild, new_description: str):
+        async with self.get_lock(user_id):
+            teams = self.group_data[str(user_id)]
+            for team in teams:
+                if team.name == name:
+                    team.description = new_description
+                    channel = await self.find_team_channel(guild, team.channel_id)
+                    if channel is not None:
+                        await channel.edit(topic=new_description)
+
+                    break
+
+            await self.save_group_data()
+
+            logging.info("Changed description of team '%s' to \"%s\"", name, new_description)
+
+    async def change_name(self, user_id: int, old_name: str, new_name: str, guild: discord.Guild):
+        async with self.get_lock(user_id):
+            teams = self.group_data[str(user_id)]
+            for team in teams:
+                if team.name == new_name:
+                    raise TeamEditError("Cannot change name of team '%s' to '%s', because name already used in one of your teams" % (old_name, new_name))
+            for team in teams:
+                if team.name == old_name:
+                    team.name = new_name
+
+                    channel = await self.find_team_channel(guild, team.channel_id)
+                    if channel is not None:
                         await channel.edit(
                             name=new_name
                         )
-                        break
 
-                roles = await guild.fetch_roles()
-                for r in roles:
-                    if r.name == (old_name + str(user_id)):
+                    r = await self.find_team_role(guild, old_name + str(user_id))
+                    if r is not None:
                         await r.edit(
                             name=(new_name + str(user_id))
                         )
-                        break
+                        if self.snapshot is not None:
+                            self.snapshot.forget_role(old_name + str(user_id))
 
-                break
-        with open(config.TEAMWORK_FILE, "w") as f:
-            f.write(json.dumps(self.group_data, indent=4, sort_keys=True))
+                    break
+            await self.save_group_data()
 
-        logging.info("Changed name from team '%s' to '%s'" % (old_name, new_name))
+            logging.info("Changed name from team '%s' to '%s'", old_name, new_name)
 
     async def cog_check(self, ctx) -> bool:
         return ctx.invoked_with != "tm" or ctx.guild is not None
 
     async def cog_before_invoke(self, ctx):
-        self.group_data = json.load(open(config.TEAMWORK_FILE, "r"))
-
-        if self.group_data.get(str(ctx.author.id)) is None:
-            self.group_data[str(ctx.author.id)] = []
-
-        with open(config.TEAMWORK_FILE, "w", encoding="utf-8") as f:
-            f.write(json.dumps(self.group_data, indent=4, sort_keys=True))
+        # the in-memory store is shared by all commands, so it must not be replaced from disk here
+        self.group_data.setdefault(str(ctx.author.id), [])
 
     async def check_user_info(self, file: str, key: str) -> None:
         if self.group_data.get(key) is None:
             self.group_data[key] = []
 
-            with open(file, "w") as f:
-                f.write(json.dumps(self.group_data, indent=4, sort_keys=True))
-        else:
-            jsn = json.load(open(config.TEAMWORK_FILE, "r"))
-            if len(jsn[key]) == Teamwork.MAX_GROUPS:
-                raise TeamCreationError(TeamCreationError.TOO_MANY)
+            await self.save_group_data(file)
+        elif len(self.group_data[key]) == Teamwork.MAX_GROUPS:
+            raise TeamCreationError(TeamCreationError.TOO_MANY)
 
-    async def get_group_summary(self, group: dict[str, Any]) -> str:
-        description: str = group["description"]
+    async def get_group_summary(self, group: Team) -> str:
+        description: str = group.description
         if len(description) > 20:
             description = description[:-3] + "..."
 
         text = ""
-        text += "**Name**: %s" % group["name"]
+        text += "**Name**: %s" % group.name
         text += "\n**Description**: %s" % description
-        text += "\n**Member**: %s" % (' '.join(group["members"] if ' '.join(group["members"]) else "_error: no members_"))
+        text += "\n**Member**: %s" % (' '.join(group.mentions) or "_error: no members_")
         return text
 
-    async def add_group_in_file(self, *, 
-        name: str, members: list[str], owner_id: int,  channel_id: int, description: str = "_No description_"
-    ) -> None:
-        group_json: dict = {
-            "name": name,
-            "members": members,
-            "owner_id": owner_id,
-            "description": description,
-            "channel_id": channel_id
-        }
+    async def add_team(self, team: Team, save: bool = True) -> None:
+        self.group_data.setdefault(str(team.owner_id), []).append(team)
+
+        if save:
+            await self.save_group_data()
+
+        logging.debug("Added team %s in json file", team.name)
 
-        self.group_data[str(owner_id)].append(group_json)
+    async def find_team_role(self, guild: discord.Guild, role_name: str) -> Optional[discord.Role]:
+        """Looks the role up in the reconciliation snapshot and the live cache. Only fetches if no snapshot was taken yet"""
+        if self.snapshot is None or self.snapshot.guild_id != guild.id:
+            return await get_role(guild, name=role_name)
 
-        with open(config.TEAMWORK_FILE, "w") as f:
-            f.write(json.dumps(self.group_data, indent=4, sort_keys=True))
+        role = self.snapshot.get_role(role_name)
+        if role is not None:
+            return guild.get_role(role.id)
+        return discord.utils.get(guild.roles, name=role_name)
 
-        logging.debug("Added team %s in json file" % name)
+    async def find_team_channel(self, guild: discord.Guild, channel_id: int) -> Optional[discord.TextChannel]:
+        channel = guild.get_channel(channel_id)
+        if channel is None and (self.snapshot is None or self.snapshot.guild_id != guild.id):
+            try:
+                channel = await self.bot.fetch_channel(channel_id)
+            except HTTPException:
+                return None
+
+        return channel if isinstance(channel, discord.TextChannel) else None
+
+    def get_lock(self, owner_id: int) -> asyncio.Lock:
+        """Returns the lock serializing all team mutations of the given owner"""
+        return self.locks.setdefault(owner_id, asyncio.Lock())
 
-    async def cog_after_invoke(self, ctx):
-        self.group_data = json.load(open(config.TEAMWORK_FILE, "r"))
+    @staticmethod
+    def load_group_data() -> dict[str, list[Team]]:
+        # the cog is created synchronously, so this is the one blocking read
+        jsn = read_json(config.TEAMWORK_FILE)
+        return {owner_id: [Team.from_json(t) for t in teams] for owner_id, teams in jsn.items()}
+
+    async def save_group_data(self, file: Optional[str] = None) -> None:
+        # converted on the loop, so the file gets the data of this moment
+        jsn = {owner_id: [t.to_json() for t in teams] for owner_id, teams in self.group_data.items()}
+        await STORAGE.save(file if file is not None else config.TEAMWORK_FILE, jsn)
 
     def has_group(self, user_id: int, group_name: str) -> bool:
-        ts: list[dict] = self.group_data[str(user_id)]
-        return any(t["name"] == group_name for t in ts)
+        ts: list[Team] = self.group_data.get(str(user_id), [])
+        return any(t.name == group_name for t in ts)
 
     def transform_to_dc_channel_name(self, name: str) -> str:
         name = name.lower()
@@ -598,22 +958,21 @@ class Teamwork(commands.Cog):
 
         return nname.strip(punctuation)
 
-    async def get_json_from_team(self, user_id: int, name: str) -> Optional[dict[str, Any]]:
+    async def get_team(self, user_id: int, name: str) -> Optional[Team]:
         teams = self.group_data[str(user_id)]
-        for tj in teams:
-            if tj["name"] == name:
-                return tj
+        for team in teams:
+            if team.name == name:
+                return team
         return None
 
     async def remove_team_from_json(self, user_id: int, name: str) -> None:
         user_teams = self.group_data[str(user_id)]
         
-        new_user_teams = [team for team in user_teams if team["name"] != name]
+        new_user_teams = [team for team in user_teams if team.name != name]
 
         self.group_data[str(user_id)] = new_user_teams
 
-        with open(config.TEAMWORK_FILE, "w") as f:
-            f.write(json.dumps(self.group_data, indent=4, sort_keys=True))
+        await self.save_group_data()
 
 def setup(bot):
     bot.add_cog(Teamwork(bot))
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import logging
 from typing import Any, Optional
 
@@ -10,7 +9,10 @@ import config
 import discord
 from discord.ext import commands, tasks
 from functions import *
-from bs4 import BeautifulSoup, element
+import metrics
+import outbound
+import parsing
+from storage import STORAGE
 
 
 class TS_News(commands.Cog):
@@ -19,53 +21,77 @@ class TS_News(commands.Cog):
     Checks news from the [tagesschau](https://www.tagesschau.de/) using their [api2](https://www.tagesschau.de/api2/news/)
     """
 
-    def __init__(self, bot: commands.Bot, url: str=config.TS_NEWS_URL_RLP, channel_id: int=config.NEWS_CHANNEL_ID, save_path: str="ts/rlp"):
+    # kept when the extension is hot reloaded
+    PERSISTENT_STATE = ("external_ids", "important_news_ids")
+    SNAPSHOT_STATE = PERSISTENT_STATE
+
+    def __init__(self, bot: commands.Bot, url: Optional[str] = None, channel_id: Optional[int] = None, save_path: str="ts/rlp"):
         commands.Cog.__init__(self)
         self.bot = bot
-        self.external_ids: list[str] = self.load_external_ids(save_path)
+        # read from the data file before the first check
+        self.external_ids: list[str] = []
         self.important_news_ids: set[str] = set()
-        self.url = url
-        self.channel_id = channel_id
+        self.url = url if url is not None else config.TS_NEWS_URL_RLP
+        self.channel_id = channel_id if channel_id is not None else config.NEWS_CHANNEL_ID
         self.save_path = save_path
         self.ts_news_loop.start()
+        config.SERVICE.subscribe(self.on_config_change)
+
+    def cog_unload(self):
+        self.ts_news_loop.cancel()
+        config.SERVICE.unsubscribe(self.on_config_change)
+
+    def on_config_change(self, old: config.ConfigSnapshot, new: config.ConfigSnapshot) -> None:
+        if old.INTERVAL != new.INTERVAL:
+            self.ts_news_loop.change_interval(seconds=new.INTERVAL)
+
+        # the defaults were taken from the config, so they follow it
+        if self.channel_id == old.NEWS_CHANNEL_ID:
+            self.channel_id = new.NEWS_CHANNEL_ID
+        for name in ("TS_NEWS_URL_RLP", "TS_NEWS_URL_BW"):
+            if self.url == getattr(old, name):
+                self.url = getattr(new, name)
 
+    # only the first interval, on_config_change follows config.INTERVAL
     @tasks.loop(seconds=config.INTERVAL)
+    @metrics.timed(metrics.LOOP_SECONDS, loop="ts_news")
     async def ts_news_loop(self):
         await self.bot.wait_until_ready()
 
-        logging.info("Chcking ts news... (%s)" % self.save_path.split("/")[1])
+        logging.info("Chcking ts news... (%s)", self.save_path.split("/")[1])
         articles = await self.get_articles()
-        logging.info("Checked ts news (%s)" % self.save_path.split("/")[1])
+        logging.info("Checked ts news (%s)", self.save_path.split("/")[1])
 
         news_channel = self.bot.get_channel(self.channel_id)
 
         if news_channel is None:
-            logging.warn("Failed to get channel with id '%s'" % self.channel_id)
+            logging.warn("Failed to get channel with id '%s'", self.channel_id)
             return
 
         for article in reversed(articles):
-            await news_channel.send(embed=article)
+            await outbound.send(news_channel, outbound.Priority.NEWS, embed=article)
 
         if len(articles):
-            logging.info("Sent %i ts atricles (%s)" % (len(articles), self.save_path.split("/")[1]))
+            logging.info("Sent %i ts atricles (%s)", len(articles), self.save_path.split("/")[1])
 
         await self.check_important_news()
     
     @ts_news_loop.before_loop
     async def before_ts_news_loop(self):
         await self.bot.wait_until_ready()
-        logging.info("ts news loop has been started (%s)" % self.save_path.split("/")[1])
+        self.external_ids = await self.load_external_ids(self.save_path)
+        logging.info("ts news loop has been started (%s)", self.save_path.split("/")[1])
 
     @ts_news_loop.after_loop
     async def after_ts_news_loop(self):
-        logging.info("ts news loop has been stopped (%s)" % self.save_path.split("/")[1])
+        logging.info("ts news loop has been stopped (%s)", self.save_path.split("/")[1])
 
     @ts_news_loop.error
     async def ts_news_loop_error(self, error):
         await report_error(self.bot, error)
 
         while not self.ts_news_loop.is_running():
-            logging.info("Trying to restart ts news loop (%s)" % self.save_path.split("/")[1])
+            logging.info("Trying to restart ts news loop (%s)", self.save_path.split("/")[1])
             try:
                 self.ts_news_loop.restart()
             except Exception as error:
@@ -73,7 +99,7 @@ class TS_News(commands.Cog):
             
             asyncio.sleep(10)
 
-        logging.info("Restarted ts news loop (%s)" % self.save_path.split("/")[1])
+        logging.info("Restarted ts news loop (%s)", self.save_path.split("/")[1])
 
     async def get_articles(self) -> list[discord.Embed]:
         async with aiohttp.ClientSession() as session:
@@ -115,7 +141,7 @@ class TS_News(commands.Cog):
                 try:
                     return images["videowebs"]["imageurl"]
                 except KeyError:
-                    logging.info("No image in ts article '%s' (%s)" % article["externalId"], self.save_path.split("/")[1])
+                    logging.info("No image in ts article '%s' (%s)", article["externalId"], self.save_path.split("/")[1])
                     return None
 
     async def get_link(self, article: dict[str, Any]) -> str:
@@ -125,12 +151,8 @@ class TS_News(commands.Cog):
             return article["detailsweb"]
 
     async def save_article(self, id: str) -> None:
-        save_json_on_path(
-            file=config.NEWS_DATA_FILE_PATH, 
-            path=self.save_path,
-            value=id
-        )
-        self.external_ids = self.load_external_ids(self.save_path)
+        await STORAGE.save_on_path(config.NEWS_DATA_FILE_PATH, self.save_path, id)
+        self.external_ids.append(id)
 
     async def check_important_news(self) -> None:
         # NOTE: was never tested
@@ -140,7 +162,8 @@ class TS_News(commands.Cog):
                     try:
                         channel = self.bot.get_channel(config.LOG_CHANNEL_ID)
                         if channel is not None:
-                            await channel.send(
+                            outbound.post(
+                                channel, outbound.Priority.DIAGNOSTICS,
                                 embed=embed_message(
                                     title="Eilmeldungscheck failed",
                                     description="Something went wrong checking whether new important news were announced or not",
@@ -148,19 +171,14 @@ class TS_News(commands.Cog):
                                 )
                             )
                     except HTTPException:
-                        logging.error("Could not report error (%s)" % self.save_path.split("/")[1])
+                        logging.error("Could not report error (%s)", self.save_path.split("/")[1])
                     return
 
                 html = await r.text()
         
-        soup = BeautifulSoup(html, "html.parser")
-        important_news = soup.find_all("div", class_="eilmeldung")
-
-        for n in important_news:
-            logging.debug("Found important news (%s)" % self.save_path.split("/")[1])
-            nsoup = BeautifulSoup(repr(n), "html.parser")
-            link = nsoup.find("a")
-            id = repr(link)
+        for n in await parsing.run(parsing.find_important_news, html):
+            logging.debug("Found important news (%s)", self.save_path.split("/")[1])
+            id = n["id"]
             if id in self.important_news_ids:
                 continue
 
@@ -171,31 +189,31 @@ class TS_News(commands.Cog):
                     console=False
                 )
                 return
-            if isinstance(link, element.Tag):
-                await channel.send(embed=embed_message(
+            if n["text"] is not None:
+                await outbound.send(channel, outbound.Priority.NEWS, embed=embed_message(
                     title="Eilmeldung",
-                    description=link.text,
+                    description=n["text"],
                     color=config.COLOR.RED,
                     author=config.TS_AUTHOR
                 ))
-                logging.info("Sent important news by text (%s)" % self.save_path.split("/")[1])
+                logging.info("Sent important news by text (%s)", self.save_path.split("/")[1])
             else:
-                await channel.send(embed=embed_message(
+                await outbound.send(channel, outbound.Priority.NEWS, embed=embed_message(
                     title="Eilmeldung",
                     description="Eine Eilmeldung ist auf der (Tagesschauseite)[%s] zu finden" % config.TS_NEWS_BASE_URL,
                     color=config.COLOR.RED,
                     author=config.TS_AUTHOR
                 ))
-                logging.info("Send important news with link to homepage (%s)" % self.save_path.split("/")[1])
+                logging.info("Send important news with link to homepage (%s)", self.save_path.split("/")[1])
         
             self.important_news_ids.add(id)
 
     @classmethod
-    def load_external_ids(cls, save_path: str) -> list[str]:
+    async def load_external_ids(cls, save_path: str) -> list[str]:
         if save_path == "ts/rlp":
-            return json.load(open(config.NEWS_DATA_FILE_PATH))["ts"]["rlp"]
+            return (await STORAGE.load(config.NEWS_DATA_FILE_PATH))["ts"]["rlp"]
         elif save_path == "ts/bw":
-            return json.load(open(config.NEWS_DATA_FILE_PATH))["ts"]["bw"]
+            return (await STORAGE.load(config.NEWS_DATA_FILE_PATH))["ts"]["bw"]
         else:
             raise ExtensionError("Extension instance was not loaded correctly (%s)" % save_path.split("/")[1], name="ts_news")
 
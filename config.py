@@ -1,53 +1,211 @@
-import json as __json
+import asyncio
+import inspect
+import json as _json
 import logging
+import os
 from datetime import datetime
-from typing import Union
+from types import MappingProxyType
+from typing import Any, Callable, Optional
 
 import discord
 from typing_extensions import Literal
 
 file_path = "./data/bot.json"
 
-data = __json.load(open(file_path, "r"))
 
+def _freeze(value: Any) -> Any:
+    """Returns the parsed json with dicts as read-only mappings and lists as tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    elif isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
 
-# default config from bot.json
-STATUS: str = data["status"]
-TOKEN: str = data["token"]
-PREFIX: str = data["prefix"]
-RESTRICTED_DEBUG_VARS: str = data["restricted_debug_vars"]
 
-EXTENSIONS: list[str] = data["load_extensions"]
-LOG_CHANNEL_ID: int = data["log_channel_id"]
-OWNER_IDS: list[int] = data["owner_ids"]
-ACTIVITY: discord.Activity = discord.Activity(
-    name=data["activity"]["name"],
-    type=getattr(discord.ActivityType, data["activity"]["type"]),
-    #details=data["activity"]["details"],
-    start=datetime.utcnow()
-)
+class ConfigSnapshot:
 
-NEWS_DATA_FILE_PATH: str = data["news"]["file_path"]
+    """The values of bot.json at one point in time. Snapshots are never changed, a changed file gives a new one"""
 
-GMO_NEWS_URL: str = data["news"]["url"]["gmo"]
-GMO_NEWS_FILE: str = data["news"]["file"]["gmo"]
-GMO_NEWS_AUTHOR: list[str] = data["news"]["author"]["gmo"]
+    __slots__ = (
+        "data", "mtime", "STATUS", "TOKEN", "PREFIX", "RESTRICTED_DEBUG_VARS", "EXTENSIONS", "LOG_CHANNEL_ID",
+        "OWNER_IDS", "ACTIVITY", "NEWS_DATA_FILE_PATH", "GMO_NEWS_URL", "GMO_NEWS_FILE", "GMO_NEWS_AUTHOR",
+        "TS_NEWS_URL_RLP", "TS_NEWS_BASE_URL", "TS_NEWS_FILE", "TS_NEWS_URL_BW", "TS_AUTHOR", "NEWS_CHANNEL_ID",
+        "INTERVAL", "ROLES", "TEAMWORK_FILE", "REMINDER_FILE"
+    )
 
-TS_NEWS_URL_RLP: str = data["news"]["url"]["ts-rlp"]
-TS_NEWS_BASE_URL: str = data["news"]["url"]["base_ts"]
-TS_NEWS_FILE: str = data["news"]["file"]["ts"]
+    def __init__(self, data: dict[str, Any], mtime: float = 0.0):
+        data = _freeze(data)
+        values = dict(
+            data=data,
+            mtime=mtime,
+            STATUS=data["status"],
+            TOKEN=data["token"],
+            PREFIX=data["prefix"],
+            RESTRICTED_DEBUG_VARS=data["restricted_debug_vars"],
+            EXTENSIONS=data["load_extensions"],
+            LOG_CHANNEL_ID=data["log_channel_id"],
+            OWNER_IDS=data["owner_ids"],
+            ACTIVITY=discord.Activity(
+                name=data["activity"]["name"],
+                type=getattr(discord.ActivityType, data["activity"]["type"]),
+                #details=data["activity"]["details"],
+                start=datetime.utcnow()
+            ),
+            NEWS_DATA_FILE_PATH=data["news"]["file_path"],
+            GMO_NEWS_URL=data["news"]["url"]["gmo"],
+            GMO_NEWS_FILE=data["news"]["file"]["gmo"],
+            GMO_NEWS_AUTHOR=data["news"]["author"]["gmo"],
+            TS_NEWS_URL_RLP=data["news"]["url"]["ts-rlp"],
+            TS_NEWS_BASE_URL=data["news"]["url"]["base_ts"],
+            TS_NEWS_FILE=data["news"]["file"]["ts"],
+            TS_NEWS_URL_BW=data["news"]["url"]["ts-bw"],
+            TS_AUTHOR=data["news"]["author"]["ts"],
+            NEWS_CHANNEL_ID=data["news"]["channel_id"],
+            INTERVAL=data["news"]["check_interval"],
+            ROLES=data["roles"],
+            TEAMWORK_FILE=data["teamwork_file"],
+            REMINDER_FILE=data["reminder_file"],
+        )
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
 
-TS_NEWS_URL_BW: str = data["news"]["url"]["ts-bw"]
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ConfigSnapshot is read-only")
 
-TS_AUTHOR: str = data["news"]["author"]["ts"]
+    @classmethod
+    def from_file(cls, path: str) -> "ConfigSnapshot":
+        mtime = os.stat(path).st_mtime
+        with open(path, "r") as f:
+            return cls(_json.load(f), mtime)
 
-NEWS_CHANNEL_ID: int = data["news"]["channel_id"]
-INTERVAL: int = data["news"]["check_interval"]
+    def values(self) -> dict[str, Any]:
+        """Returns the values which are module variables of config"""
+        return {name: getattr(self, name) for name in ConfigSnapshot.__slots__ if name != "mtime"}
 
-ROLES: dict[str, dict[str, Union[int, str]]] = data["roles"]
+    def changed(self, other: "ConfigSnapshot") -> set[str]:
+        """Returns the names of the values which differ from the other snapshot"""
+        return {
+            name for name in ConfigSnapshot.__slots__
+            if name not in ("data", "mtime", "ACTIVITY") and getattr(self, name) != getattr(other, name)
+        } | ({"ACTIVITY"} if self.data["activity"] != other.data["activity"] else set())
 
-TEAMWORK_FILE: str = data["teamwork_file"]
-REMINDER_FILE: str = data["reminder_file"]
+
+class ConfigService:
+
+    """
+    Watches bot.json by its modification time. A changed file is parsed into a new snapshot, which replaces the
+    module variables of config at once. Subscribers are called with the old and the new snapshot afterwards and
+    may return a coroutine
+    """
+
+    def __init__(self, path: str, namespace: dict[str, Any]):
+        self.path = path
+        self.namespace = namespace
+        self.snapshot = ConfigSnapshot.from_file(path)
+        self.subscribers: list[Callable[[ConfigSnapshot, ConfigSnapshot], Any]] = []
+        self.__task: Optional[asyncio.Task] = None
+        self.__failed_mtime = 0.0
+        self.namespace.update(self.snapshot.values())
+
+    def subscribe(self, callback: Callable[[ConfigSnapshot, ConfigSnapshot], Any]) -> None:
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[ConfigSnapshot, ConfigSnapshot], Any]) -> None:
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def poll(self, force: bool = False) -> bool:
+        """
+        Loads the file if it was changed since the last snapshot
+        @return: whether a new snapshot was loaded
+        @rtype: bool
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            logging.warning("Could not check %s: %s", self.path, e)
+            return False
+
+        if not force and mtime in (self.snapshot.mtime, self.__failed_mtime):
+            return False
+
+        try:
+            snapshot = ConfigSnapshot.from_file(self.path)
+        except Exception as e:
+            # the file is probably being edited, the next change is tried again
+            self.__failed_mtime = mtime
+            logging.warning("Could not load %s: %s", self.path, e)
+            return False
+
+        self.swap(snapshot)
+        return True
+
+    def swap(self, snapshot: ConfigSnapshot) -> None:
+        old, self.snapshot = self.snapshot, snapshot
+        self.namespace.update(snapshot.values())
+
+        changed = snapshot.changed(old)
+        logging.info("Config changed: %s", ", ".join(sorted(changed)) or "nothing")
+        if not changed:
+            return
+
+        for callback in list(self.subscribers):
+            try:
+                result = callback(old, snapshot)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logging.error("Config subscriber %r failed: %s", callback, e)
+
+    async def watch(self, interval: float = 5.0) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.poll()
+
+    def start(self, interval: float = 5.0) -> None:
+        if self.__task is None or self.__task.done():
+            self.__task = asyncio.get_running_loop().create_task(self.watch(interval))
+
+
+# default config from bot.json, set by the service and replaced when the file changes
+data: MappingProxyType
+STATUS: str
+TOKEN: str
+PREFIX: str
+RESTRICTED_DEBUG_VARS: tuple[str, ...]
+
+EXTENSIONS: tuple[str, ...]
+LOG_CHANNEL_ID: int
+OWNER_IDS: tuple[int, ...]
+ACTIVITY: discord.Activity
+
+NEWS_DATA_FILE_PATH: str
+
+GMO_NEWS_URL: str
+GMO_NEWS_FILE: str
+GMO_NEWS_AUTHOR: tuple[str, ...]
+
+TS_NEWS_URL_RLP: str
+TS_NEWS_BASE_URL: str
+TS_NEWS_FILE: str
+
+TS_NEWS_URL_BW: str
+
+TS_AUTHOR: str
+
+NEWS_CHANNEL_ID: int
+INTERVAL: int
+
+ROLES: MappingProxyType  # role name -> {"id": ..., ...}
+
+TEAMWORK_FILE: str
+REMINDER_FILE: str
+
+# the service survives importlib.reload, so the subscribers stay registered
+try:
+    SERVICE.poll(force=True)  # type: ignore
+except NameError:
+    SERVICE = ConfigService(file_path, globals())
 
 # for discord
 EMPTY_CHAR = "\u200B"  # symbol: "­"
@@ -66,6 +224,41 @@ ALLOWED_SYMBOLS_IN_CHANNEL_NAME = "-$`´µ"
 FILE_FP: list = []
 CONNECTED: bool = True
 
+# warm restart
+RESTART_SNAPSHOT_FILE: str = "./data/restart.pickle"
+RESTART_SNAPSHOT_MAX_AGE: int = 600  # seconds
+
+# metrics in the Prometheus text format
+METRICS_FILE: str = "./data/metrics.prom"
+METRICS_WRITE_INTERVAL: int = 60  # seconds
+
+# event loop lag watchdog, in seconds
+WATCHDOG_INTERVAL: float = 0.05
+WATCHDOG_THRESHOLD: float = 0.25
+
+# where the news pages are parsed: "thread", "process" or "none" for the event loop
+PARSE_EXECUTOR: str = "thread"
+PARSE_WORKERS: int = 2
+
+# repeated errors are summarized once per window, the latest tracebacks are kept for the errors command
+ERROR_REPORT_WINDOW: int = 60  # seconds
+ERROR_RING_SIZE: int = 50
+
+# messages sent to discord, see outbound.py
+OUTBOUND_CONCURRENCY: int = 4  # requests in flight at once
+OUTBOUND_QUEUE_SIZE: int = 100  # queued requests per priority
+
+# logging, see logs.py. LOG_LEVELS has the levels of loggers, e.g. "discord", and of the bot's modules, e.g. "ts_news"
+LOG_LEVEL: str = "DEBUG"
+LOG_LEVELS: dict[str, str] = {
+    "discord": "CRITICAL",
+    "aiohttp": "CRITICAL",
+    "urllib3": "CRITICAL",
+    "asyncio": "CRITICAL",
+}
+LOG_MIRROR_INTERVAL: int = 0  # seconds between batches of records sent to the log channel, 0 disables it
+LOG_MIRROR_LEVEL: str = "WARNING"
+
 # emojis
 PREV_PAGE_EMOJI: str = chr(9664)  # left arrow
 NEXT_PAGE_EMOJI: str = chr(9654)  # right arrow
@@ -113,8 +306,8 @@ class COLOR(object):
 
 
 def reload() -> Literal['Reloaded config successfully']:
-    import importlib
-    importlib.reload(__import__(__name__))
+    # the values are swapped in place, modules importing config see them without being reloaded
+    SERVICE.poll(force=True)
 
     return "Reloaded config successfully"
 
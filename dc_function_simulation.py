@@ -1,10 +1,12 @@
 
+import io
 import warnings
 
 from discord.ext.commands.errors import *
 
 from errors import *
 from functions import *
+import outbound
 
 
 def not_allowed(err: str):
@@ -28,30 +30,132 @@ def dc_open(filename, mode, encoding, **kwargs):
 
     return config.FILE_FP[-1]
 
-def dc_print(channel, user: Union[discord.User, discord.Member]):
-    def new_print(*values: Any, sep=" ", end="\n") -> None:
-        import tracemalloc
-        #tracemalloc.start()
-        text =  sep.join([str(x) for x in values]) + end
-        if not text:
-            text = "\u200B"
-
-        asyncio.run(channel.send(
-            embed=embed_message(
-                title="Console output",
-                description = "```" + text + "```",
-                author=user,
-                timestamp=False,
-                color=config.COLOR.INFO
+class ConsoleBuffer:
+
+    """
+    Replacement of `print` for debug programs. The output is collected and sent in batches of code block messages,
+    either after a short delay or when a message is full. Everything after `MAX_MESSAGES` messages is attached as a file
+    """
+
+    FLUSH_INTERVAL = 0.5
+    MESSAGE_SIZE = 1900
+    MAX_MESSAGES = 5
+
+    def __init__(self, channel: discord.abc.Messageable, user: Union[discord.User, discord.Member]):
+        self.channel = channel
+        self.user = user
+        self.loop = asyncio.get_running_loop()
+        self.pending: list[str] = []
+        self.pending_size = 0
+        self.overflow: list[str] = []
+        self.sent_messages = 0
+        self.__lock = asyncio.Lock()
+        self.__timer: Optional[asyncio.Task] = None
+        # whether the timer is past its sleep and sending, then it must not be cancelled
+        self.__timer_flushing = False
+        # sends full messages, at most one at a time however much is printed
+        self.__size_flush: Optional[asyncio.Task] = None
+
+    def __call__(self, *values: Any, sep=" ", end="\n", **_) -> None:
+        self.write(sep.join([str(x) for x in values]) + end)
+
+    def write(self, text: str) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        # print may be called from an executor thread of the program
+        if running is not self.loop:
+            self.loop.call_soon_threadsafe(self.write, text)
+            return
+
+        if self.sent_messages >= ConsoleBuffer.MAX_MESSAGES:
+            self.overflow.append(text)
+            return
+
+        self.pending.append(text)
+        self.pending_size += len(text)
+
+        if self.pending_size >= ConsoleBuffer.MESSAGE_SIZE and (self.__size_flush is None or self.__size_flush.done()):
+            self.__size_flush = self.loop.create_task(self.__flush_full())
+        if self.__timer is None or self.__timer.done():
+            self.__timer = self.loop.create_task(self.__flush_later())
+
+    async def __flush_full(self) -> None:
+        # text printed while a message is sent is added to pending, so it may be full again afterwards
+        while self.pending_size >= ConsoleBuffer.MESSAGE_SIZE and self.sent_messages < ConsoleBuffer.MAX_MESSAGES:
+            await self.flush()
+
+    async def __flush_later(self) -> None:
+        await asyncio.sleep(ConsoleBuffer.FLUSH_INTERVAL)
+        self.__timer_flushing = True
+        try:
+            await self.flush()
+        finally:
+            self.__timer_flushing = False
+
+    async def flush(self) -> None:
+        async with self.__lock:
+            text = "".join(self.pending)
+            self.pending.clear()
+            self.pending_size = 0
+
+            while text:
+                if self.sent_messages >= ConsoleBuffer.MAX_MESSAGES:
+                    self.overflow.append(text)
+                    return
+
+                chunk = text[:ConsoleBuffer.MESSAGE_SIZE]
+                # prefer to split between lines
+                if len(text) > ConsoleBuffer.MESSAGE_SIZE and (cut := chunk.rfind("\n")) > 0:
+                    chunk = chunk[:cut + 1]
+                text = text[len(chunk):]
+
+                self.sent_messages += 1
+                await outbound.send(self.channel, outbound.Priority.INTERACTIVE, embed=embed_message(
+                    title="Console output",
+                    description="```" + (chunk.replace("```", "`\u200B`\u200B`") or "\u200B") + "```",
+                    author=self.user,
+                    timestamp=False,
+                    color=config.COLOR.INFO
+                ))
+
+    async def close(self) -> None:
+        """Sends everything which is left. The overflow is attached as a file"""
+        timer = self.__timer
+        if timer is not None and not timer.done():
+            if self.__timer_flushing:
+                # the timer took the pending text already, cancelling it would lose that
+                await timer
+            else:
+                timer.cancel()
+        if self.__size_flush is not None:
+            await self.__size_flush
+        await self.flush()
+
+        if self.overflow:
+            text = "".join(self.overflow)
+            self.overflow.clear()
+            await outbound.send(
+                self.channel, outbound.Priority.INTERACTIVE,
+                embed=embed_message(
+                    title="Console output",
+                    description="The output was too long, the remaining %i characters are attached" % len(text),
+                    author=self.user,
+                    timestamp=False,
+                    color=config.COLOR.INFO
+                ),
+                file=discord.File(io.BytesIO(text.encode("utf-8")), filename="console.txt")
             )
-        ))
-        
-        #tracemalloc.stop()
-        return None
-    return new_print
+
+
+def dc_print(channel, user: Union[discord.User, discord.Member]) -> ConsoleBuffer:
+    return ConsoleBuffer(channel, user)
 
 
 def dc_function_reload():
-    import importlib
-    importlib.reload(__import__(__name__))
+    # reloads the modules importing this one as well
+    import reloader
+    reloader.reload_module(__name__)
     return "Reloaded dc_function_simulation successfully"
\ No newline at end of file
@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+import discord
+from discord.ext import commands
+
+import config
+import outbound
+
+
+# not reloaded by reloader.py, pending summaries are timers of REPORTER
+RELOADABLE = False
+
+
+def fingerprint(e: BaseException) -> str:
+    """Identifies an error by its type and the frames it was raised through, the message is ignored"""
+    frames = traceback.extract_tb(e.__traceback__)
+    key = "|".join([type(e).__qualname__] + ["%s:%s:%s" % (os.path.basename(f.filename), f.name, f.lineno) for f in frames])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+
+
+class ErrorRecord:
+
+    __slots__ = ("fingerprint", "type_name", "message", "count", "pending", "first_seen", "last_seen", "last_sent",
+                 "flush_handle", "bot", "channel_id")
+
+    def __init__(self, fingerprint: str, e: BaseException):
+        self.fingerprint = fingerprint
+        self.type_name = type(e).__name__
+        self.message = str(e)
+        self.count = 0
+        # occurrences since the last message in the channel
+        self.pending = 0
+        self.first_seen = time.time()
+        self.last_seen = 0.0
+        self.last_sent = 0.0
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.bot: Optional[commands.Bot] = None
+        self.channel_id = 0
+
+
+class ErrorReporter:
+
+    """
+    Coalesces errors with the same fingerprint. The first one is reported with its traceback, repeats within `window`
+    seconds are only counted and sent as one summary at the end of the window. The tracebacks of the latest errors are
+    kept in a ring buffer, and records are dropped once their window is over and their traceback left the ring buffer
+    """
+
+    def __init__(self, window: float = 60.0, ring_size: int = 50):
+        self.window = window
+        self.records: dict[str, ErrorRecord] = {}
+        # (time, fingerprint, traceback) without the frames, so their locals are freed
+        self.recent: deque[tuple[float, str, traceback.TracebackException]] = deque(maxlen=ring_size)
+        self.__next_prune = 0.0
+
+    def submit(self, bot: commands.Bot, e: BaseException, channel_id: int) -> Optional[ErrorRecord]:
+        """
+        Records the error
+        @return: the record if the error should be reported now, None if it is part of the next summary
+        @rtype: Optional[ErrorRecord]
+        """
+        key = fingerprint(e)
+        now = time.time()
+        if now >= self.__next_prune:
+            self.prune(now)
+            self.__next_prune = now + self.window
+
+        record = self.records.get(key)
+        if record is None:
+            record = self.records[key] = ErrorRecord(key, e)
+
+        record.count += 1
+        record.last_seen = now
+        record.message = str(e)
+        record.bot = bot
+        record.channel_id = channel_id
+        self.recent.append((now, key, traceback.TracebackException(type(e), e, e.__traceback__)))
+
+        if record.flush_handle is None and now - record.last_sent >= self.window:
+            record.last_sent = now
+            return record
+
+        record.pending += 1
+        if record.flush_handle is None:
+            record.flush_handle = asyncio.get_running_loop().call_later(
+                record.last_sent + self.window - now, self.__flush, record
+            )
+        return None
+
+    def prune(self, now: float) -> None:
+        """Drops the records without a pending summary whose window is over, unless the ring buffer has their traceback"""
+        recent = {fp for _, fp, _ in self.recent}
+        expired = [
+            key for key, record in self.records.items()
+            if record.flush_handle is None and key not in recent and now - max(record.last_seen, record.last_sent) >= self.window
+        ]
+        for key in expired:
+            del self.records[key]
+
+    def __flush(self, record: ErrorRecord) -> None:
+        record.flush_handle = None
+        if record.pending:
+            asyncio.ensure_future(self.send_summary(record))
+
+    async def send_summary(self, record: ErrorRecord) -> None:
+        pending, record.pending = record.pending, 0
+        record.last_sent = time.time()
+
+        channel = record.bot.get_channel(record.channel_id) if record.bot is not None else None
+        if channel is None:
+            logging.error("Failed to get channel with id %s", record.channel_id)
+            return
+
+        # a plain embed, functions imports this module to report errors
+        outbound.post(channel, outbound.Priority.DIAGNOSTICS, embed=discord.Embed(
+            title="Repeated '%s'" % record.type_name,
+            description="`%s` occurred %i more time(s) within %is, %i time(s) in total.\n"
+                        "Use `%serrors %s` to see the latest traceback" % (
+                            record.message[:1500], pending, self.window, record.count, config.PREFIX, record.fingerprint
+                        ),
+            color=config.COLOR.ERROR,
+            timestamp=datetime.utcnow()
+        ))
+
+    def latest_trace(self, key: str) -> Optional[str]:
+        """Returns the latest formatted traceback of the fingerprint or of the most recent error with an empty key"""
+        for _, fp, tb in reversed(self.recent):
+            if not key or fp.startswith(key):
+                return "".join(tb.format())
+        return None
+
+    def summary(self) -> list[ErrorRecord]:
+        return sorted(self.records.values(), key=lambda r: r.last_seen, reverse=True)
+
+
+REPORTER = ErrorReporter(config.ERROR_REPORT_WINDOW, config.ERROR_RING_SIZE)
@@ -7,23 +7,34 @@ import logging
 import random
 import traceback
 from datetime import  datetime, timedelta
-from types import MappingProxyType
-from typing import Any, Iterable, Literal, Mapping, Optional, Union
+from typing import Any, Iterable, Iterator, Literal, Mapping, Optional, Union
 
 import discord
 from discord.embeds import _EmptyEmbed, EmptyEmbed
 from discord.ext import commands
 
 import config
+import error_reports
+import metrics
+import outbound
 
 LINK_DESTROYER = list(" \n\\<>'\"")
 
 async def report_error(bot: commands.Bot, e: BaseException, 
-    log_level=logging.WARN, console: bool=True, channel_id: int = config.LOG_CHANNEL_ID,
+    log_level=logging.WARN, console: bool=True, channel_id: Optional[int] = None,
     **extra
 ) -> None:
+    if channel_id is None:
+        channel_id = config.LOG_CHANNEL_ID
+    metrics.ERRORS_REPORTED.inc(type=type(e).__name__)
+    # repeats of an error within the window are sent as one summary later
+    if error_reports.REPORTER.submit(bot, e, channel_id) is None:
+        if console:
+            logging.log(log_level, "Repeated error '%s' with value '%s'", type(e), str(e))
+        return
+
     if console:
-        logging.log(log_level, "Report error '%s' with value '%s'" % (type(e), str(e)), extra={"in_console": console})
+        logging.log(log_level, "Report error '%s' with value '%s'", type(e), str(e), extra={"in_console": console})
         traceback.print_exception(
             etype=type(e),
             value=e,
@@ -32,9 +43,9 @@ async def report_error(bot: commands.Bot, e: BaseException,
     
     channel = bot.get_channel(channel_id)
     if channel is None:
-        logging.error("Failed to get channel with id %s" % channel_id)
+        logging.error("Failed to get channel with id %s", channel_id)
         return
-    await channel.send(embed=embed_error(e, bot=bot), **extra)
+    outbound.post(channel, outbound.Priority.DIAGNOSTICS, embed=embed_error(e, bot=bot), **extra)
     
 
 def embed_message(*,
@@ -126,7 +137,7 @@ def embed_message(*,
             )
 
         else:
-            logging.warning("Field property '%s' was not added because of wrong structure" % f)
+            logging.warning("Field property '%s' was not added because of wrong structure", f)
 
     return embed
 
@@ -282,9 +293,12 @@ def has_all_roles(member: discord.Member, roles: Iterable[Union[str, int]]) -> b
     return all(has_role(member, r) for r in roles)
 
 
-def save_json_on_path(*, file: str, path: str, value: Any) -> None:
-    jsn = json.load(open(file, "r", encoding='utf-8'))
-
+def set_json_path(jsn: Any, path: str, value: Any) -> None:
+    """
+    Sets the value at the slash separated path of the parsed json. If the value at the path is a list, the value is appended
+    @param jsn: the parsed json which is changed
+    @param path: e.g. `gmo/0/version`, list indices are numbers
+    """
     tree_part = jsn
 
     if path.startswith("/"):
@@ -310,9 +324,6 @@ def save_json_on_path(*, file: str, path: str, value: Any) -> None:
     else:
         raise ValueError("Key '%s' can't be used because of wrong data type or it does not exist" % path.split("/"))
 
-    with open(file, "w", encoding='utf-8') as f:
-        f.write(json.dumps(jsn, indent=4, sort_keys=True))
-
 
 def escape_dc_chars(text: str) -> str:
     """Puts `\\` before symbols `*` and `_`
@@ -347,66 +358,102 @@ def embed_error(error: BaseException, *, color: discord.Color = config.COLOR.RED
     )
 
 
-def pyformat(pyt, type = str) -> str:
-    ret = None
-    if isinstance(pyt, str) and isinstance(type, str):
-        ret = pyt
-
-    elif isinstance(pyt, list) or isinstance(type, list):
-        pyt = str(repr(pyt))[1:-1].split(", ")
-        pyt = ',\n  '.join(pyt)
+def pyformat(obj: Any, *, max_depth: int = 4, max_items: int = 50, max_chars: int = 2000, indent: int = 2) -> str:
+    """
+    Formats the object like python code without changing it. Containers deeper than `max_depth` and items after
+    `max_items` are abbreviated and the formatting stops as soon as `max_chars` characters were produced
+    @param obj: any object
+    @return: the formatted object which ends with `...` if it was cut
+    @rtype: str
+    """
+    def leaf(value: Any) -> str:
+        if isinstance(value, str) and len(value) > max_chars:
+            return repr(value[:max_chars]) + "..."
+        try:
+            return repr(value)[:max_chars]
+        except Exception as e:
+            return "<%s object (repr failed: %r)>" % (type(value).__name__, e)
 
-        ret = "[\n  " + pyt + "\n]"
+    def walk(value: Any, level: int) -> Iterator[str]:
+        if isinstance(value, Mapping):
+            brackets = "{}"
+        elif isinstance(value, list):
+            brackets = "[]"
+        elif isinstance(value, tuple) and not hasattr(value, "_fields"):
+            brackets = "()"
+        elif isinstance(value, (set, frozenset)) and value:
+            brackets = "{}"
+        else:
+            yield leaf(value)
+            return
+
+        if not value:
+            yield leaf(value)
+            return
+
+        # recursive containers and too deep ones are abbreviated
+        if id(value) in path or level >= max_depth:
+            yield brackets[0] + "..." + brackets[1]
+            return
+
+        path.add(id(value))
+        padding = " " * indent * (level + 1)
+        yield brackets[0] + "\n"
+
+        for i, item in enumerate(value.items() if isinstance(value, Mapping) else value):
+            if i >= max_items:
+                yield padding + "... (%i more)\n" % (len(value) - max_items)
+                break
+
+            yield padding
+            if isinstance(value, Mapping):
+                yield leaf(item[0]) + ": "
+                yield from walk(item[1], level + 1)
+            else:
+                yield from walk(item, level + 1)
+            yield ",\n"
 
-    elif isinstance(pyt, dict) or isinstance(type, dict) or isinstance(pyt, Mapping):
-        ret = json.dumps(make_json_serializable(pyt, func=lambda x: str(repr(x))), indent=2)
-        ret = convert_json_kwds_to_py_kywd(ret)
+        yield " " * indent * level + brackets[1]
+        path.discard(id(value))
 
-    elif isinstance(pyt, MappingProxyType):
-        ret = json.dumps(make_json_serializable(dict(pyt), func=lambda x: str(repr(x))), indent=2)
-        ret = convert_json_kwds_to_py_kywd(ret)
+    path: set[int] = set()
+    parts: list[str] = []
+    size = 0
+    for part in walk(obj, 0):
+        parts.append(part)
+        size += len(part)
+        if size > max_chars:
+            return "".join(parts)[:max(max_chars - 3, 0)] + "..."
 
-    else:
-        ret = repr(pyt)
-    
-    return ret
+    return "".join(parts)
 
 
-def make_json_serializable(d, func = lambda x: str(repr(x))) -> dict[str, Any]:
+def make_json_serializable(d: Mapping, func = lambda x: str(repr(x))) -> dict[str, Any]:
     """
-    Takes in a dict and converts all values which are not defined in json in strings using func(value). If this raises an exception it will try
-    not catch the error. Keys are converted like values in strings if they are not already strings
+    Takes in a dict and returns a copy where all values which are not defined in json are converted in strings using
+    func(value). Errors raised by func are not caught. Keys are converted like values in strings if they are not already
+    strings. The given dict is not changed
     @param d: any dict
     @param func: the functions used to convert not serializable_objects. Needs to return something
     @return: the json serializable dict
     @rtype: dict
     """
-    def convert_value_of_list(v: Any) -> Union[float, int, str, bool, list, dict, None]:
-        if not isinstance(v, (float, int, str, bool, list, dict, type(None))):
-            v = func(v)
-
-        elif isinstance(v, dict):
+    def convert(v: Any) -> Union[float, int, str, bool, list, dict, None]:
+        if isinstance(v, Mapping):
             return make_json_serializable(v, func=func)
 
-        elif isinstance(v, list):
-            return [convert_value_of_list(sub_v) for sub_v in v]
+        elif isinstance(v, (list, tuple)):
+            return [convert(sub_v) for sub_v in v]
 
-        return v
-
-    for key, value in d.items():
-        if not isinstance(key, str):
-            func(key)
+        elif not isinstance(v, (float, int, str, bool, type(None))):
+            return func(v)
 
-        if isinstance(value, dict):
-            d[key] = make_json_serializable(value, func=func)
-
-        elif isinstance(value, list):
-            d[key] = [convert_value_of_list(v) for v in value]
+        return v
 
-        elif not isinstance(value, (float, int, str, bool, list, dict, type(None))):
-            d[key] = func(value)
-    
-    return d
+    return {
+        (key if isinstance(key, str) else func(key)): convert(value)
+        for key, value in d.items()
+    }
 
 
 def convert_json_kwds_to_py_kywd(json_str: str) -> str:
@@ -431,8 +478,9 @@ def create_console_message(msg: str) -> discord.Embed:
 
 
 def functions_reload() -> Literal['Reloaded functions successfully']:
-    import importlib
-    importlib.reload(__import__(__name__))
+    # reloads the modules importing this one as well
+    import reloader
+    reloader.reload_module(__name__)
 
     return "Reloaded functions successfully"
 
@@ -445,23 +493,22 @@ def parse_prgm(pycode: str) -> str:
     @rtype: str
     """
     quoted = False
-    fpycode = ""
+    fpycode: list[str] = []
     last_sym = ""
 
     for letter in pycode:
         if letter == "\"":
             if not quoted and last_sym == "\\":
-                fpycode += "\\"  # `'` will be added in the end of the if block
+                fpycode.append("\\")  # `'` will be added in the end of the if block
             else:
-                letter += ""
                 quoted = bool(int(quoted) + 1 % 2)
 
-            fpycode += "\'"
+            fpycode.append("\'")
 
         else:
-            fpycode += letter
+            fpycode.append(letter)
 
-    return fpycode
+    return "".join(fpycode)
 
 
 def insert_ast_returns(body) -> None:
@@ -480,6 +527,83 @@ def insert_ast_returns(body) -> None:
         insert_ast_returns(body[-1].body)
 
 
+class _AssignedNames(ast.NodeVisitor):
+
+    """Collects the names bound by statements of one scope without entering nested scopes"""
+
+    def __init__(self):
+        self.names: set[str] = set()
+        self.excluded: set[str] = set()
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, (ast.Store, ast.Del)):
+            self.names.add(node.id)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        # annotated names cannot be declared global
+        if isinstance(node.target, ast.Name):
+            self.excluded.add(node.target.id)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node) -> None:
+        self.names.add(node.name)
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+
+        # nested functions using nonlocal need the name to stay local
+        for child in ast.walk(node):
+            if isinstance(child, ast.Nonlocal):
+                self.excluded.update(child.names)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_ClassDef = visit_FunctionDef
+
+    def visit_Lambda(self, node) -> None:
+        pass
+
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = visit_Lambda
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.name:
+            self.names.add(node.name)
+        self.generic_visit(node)
+
+    def visit_alias(self, node: ast.alias) -> None:
+        if node.name != "*":
+            self.names.add(node.asname or node.name.split(".")[0])
+
+    def visit_MatchAs(self, node) -> None:
+        if node.name:
+            self.names.add(node.name)
+        self.generic_visit(node)
+
+    def visit_MatchStar(self, node) -> None:
+        if node.name:
+            self.names.add(node.name)
+
+    def visit_MatchMapping(self, node) -> None:
+        if node.rest:
+            self.names.add(node.rest)
+        self.generic_visit(node)
+
+
+def insert_ast_globals(body) -> set[str]:
+    """
+    Declares every name the function body binds as global, so the values stay in the namespace after the function returned
+    @return: the names declared global
+    @rtype: set[str]
+    """
+    visitor = _AssignedNames()
+    for stmt in body:
+        visitor.visit(stmt)
+
+    names = visitor.names - visitor.excluded
+    if names:
+        body.insert(0, ast.Global(names=sorted(names)))
+        ast.fix_missing_locations(body[0])
+    return names
+
+
 def get_random_pfp(bot: commands.Bot) -> Union[str, None]:
     u: Optional[discord.User] = bot.get_user(random.choice(config.OWNER_IDS))
     if u is None:
@@ -578,6 +702,59 @@ async def ask_for_message(bot: commands.Bot, channel: discord.abc.Messageable,
         return msg
 
 
+async def send_pages(bot: commands.Bot, channel: discord.abc.Messageable, pages: list[discord.Embed],
+    *,
+    user: Optional[Union[discord.User, discord.Member]] = None,
+    timeout: float = 60.0,
+    **extra
+) -> discord.Message:
+    """
+    Sends the pages as one message which can be turned with the page emojis until nobody reacts within `timeout`
+    @param extra: passed to the `send` of the first page, e.g. a file
+    @return: the sent message
+    @rtype: discord.Message
+    """
+    def check_reaction(reaction: discord.Reaction, _user: discord.User) -> bool:
+        return (
+            reaction.message.id == msg.id
+            and str(reaction.emoji) in config.PAGE_EMOJIS
+            and (user is None or _user.id == user.id)
+        )
+
+    msg: discord.Message = await channel.send(embed=pages[0], **extra)
+    if len(pages) == 1:
+        return msg
+
+    for emoji in config.PAGE_EMOJIS:
+        await msg.add_reaction(emoji)
+
+    page_index = 0
+    while True:
+        try:
+            reaction, reacting_user = await bot.wait_for("reaction_add", timeout=timeout, check=check_reaction)
+        except asyncio.TimeoutError:
+            break
+
+        if reaction.emoji == config.STOP_SIGN_EMOJI:
+            break
+        elif reaction.emoji == config.NEXT_PAGE_EMOJI:
+            page_index = (page_index + 1) % len(pages)
+        elif reaction.emoji == config.PREV_PAGE_EMOJI:
+            page_index = (page_index - 1) % len(pages)
+
+        await outbound.edit(msg, outbound.Priority.PAGINATION, embed=pages[page_index])
+        try:
+            await reaction.remove(reacting_user)
+        except discord.HTTPException:
+            pass
+
+    try:
+        await msg.clear_reactions()
+    except discord.HTTPException:
+        logging.info("Failed to remove the page emojis of message %s", msg.id)
+    return msg
+
+
 def get_category(categories: Iterable[discord.CategoryChannel], *, name=None, id=None) -> Optional[discord.CategoryChannel]:
     if name is None and id is None:
         raise NoFilterSetError("You need to set at least one filter (id or name)")
@@ -590,11 +767,8 @@ def get_category(categories: Iterable[discord.CategoryChannel], *, name=None, id
     return None
 
 
-async def remove_member_role(role: discord.Role, member: discord.Member) -> None:
-    new_roles = [r for r in member.roles if r.id != role.id]
-    await member.edit(
-        roles=new_roles
-    )
+async def remove_member_role(role: discord.Role, member: discord.Member, reason: str=None) -> None:
+    await member.remove_roles(role, reason=reason)
 
 
 async def add_member_role(role: discord.Role, member: discord.Member, reason: str=None) -> None:
@@ -692,5 +866,4 @@ if __name__ == "__main__":
     print(html_to_dc_md("<em><p color=\"#8f6a7b\">h<strong>a<br/></strong>llo</p></em>"))
     print(html_to_dc_md("<p>lol<ol><li><em>hal</em>lo</li><li>32io320</li></ol>lol</p>"))
     print(html_to_dc_md("<a href=\"https://gymnasium-oberstadt.de/fdfddf\">lol</a>"))
-    # save_json_on_path(file="data/news.json", path="h1/h4/2/h6", value="hello")
     print(INF)
@@ -35,7 +35,7 @@ class HelpCommand(commands.HelpCommand):
     async def prepare_help_command(self, ctx, command):
         self.ctx = ctx
         self.command = command
-        logging.info("Help command called by %s" % ctx.author)
+        logging.info("Help command called by %s", ctx.author)
 
     async def send_bot_help(self, mapping):
         cogs: list[commands.Cog] = await self.get_cogs(mapping)
@@ -66,7 +66,7 @@ class HelpCommand(commands.HelpCommand):
                 embed.description += "\n\n_```No commands```_"
 
             pages.append(embed)
-            logging.debug("Added cog %s to help command pages" % cog.qualified_name)
+            logging.debug("Added cog %s to help command pages", cog.qualified_name)
 
         first_pages = [
             embed_message(
@@ -127,7 +127,7 @@ class HelpCommand(commands.HelpCommand):
             try:
                 await msg.add_reaction(s)
             except DiscordException:
-                logging.error("Could not add reaction %s to help msg requested by %s" % (s, self.ctx.author))
+                logging.error("Could not add reaction %s to help msg requested by %s", s, self.ctx.author)
 
         opened: bool = True
         while opened:
@@ -158,17 +158,17 @@ class HelpCommand(commands.HelpCommand):
             try:
                 await msg.remove_reaction(s, self.ctx.bot.user)  # type: ignore
             except DiscordException:
-                logging.info("Emoji %s could not be removed" % s)
+                logging.info("Emoji %s could not be removed", s)
         
         try:
             await msg.delete()
         except HTTPException:
-            logging.info("Failed to delete help message for %s in channel '%s'" % (self.ctx.author, self.ctx.channel.name))  # type: ignore
+            logging.info("Failed to delete help message for %s in channel '%s'", self.ctx.author, self.ctx.channel.name)  # type: ignore
         
         try:
             await self.ctx.message.delete()  # type: ignore
         except (HTTPException, NotFound):
-            logging.info("Failed to delete help request message for %s in channel '%s'" % (self.ctx.author, self.ctx.channel.name)) # type: ignore
+            logging.info("Failed to delete help request message for %s in channel '%s'", self.ctx.author, self.ctx.channel.name) # type: ignore
 
     async def send_cog_help(self, cog: commands.Cog):
         cmds = await self.get_commands_from_cog(cog)
@@ -0,0 +1,157 @@
+"""
+Logging of the bot. The logging calls only put their records into a queue, a thread formats them and writes them to
+stderr, so the event loop neither formats messages nor waits for the terminal. Warnings and errors can be mirrored to
+the log channel in batches
+"""
+import asyncio
+import io
+import logging
+import logging.handlers
+import queue
+import sys
+from collections import deque
+from typing import Mapping, Optional, Union
+
+import discord
+from discord.ext import commands
+
+import config
+import outbound
+from functions import embed_message
+
+# not reloaded by reloader.py, a new listener would leave the old thread running
+RELOADABLE = False
+
+FORMAT = "%(asctime)s | %(levelname)s: %(filename)s - %(lineno)s: %(message)s"
+MIRROR_FORMAT = "%(levelname)s %(filename)s:%(lineno)s: %(message)s"
+
+LISTENER: Optional[logging.handlers.QueueListener] = None
+MIRROR: Optional["ChannelMirror"] = None
+
+
+def get_level(level: Union[int, str]) -> int:
+    return level if isinstance(level, int) else logging.getLevelName(level.upper())
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+
+    """
+    Puts the records into the queue as they are, the message is formatted by the handlers of the listener. Records with
+    arguments which may still change, e.g. dicts or teams, are formatted here, so the message shows the logged state
+    """
+
+    IMMUTABLE = (str, int, float, bool, bytes, type(None))
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # a single dict argument becomes the args of the record, the dict itself may change
+        if record.args and (
+            isinstance(record.args, Mapping) or not all(isinstance(v, LazyQueueHandler.IMMUTABLE) for v in record.args)
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class ModuleLevelFilter(logging.Filter):
+
+    """
+    The bot logs with the root logger, so the levels of its own modules are checked by the name of the module the
+    record was created in
+    """
+
+    def __init__(self, levels: Mapping[str, Union[int, str]]):
+        logging.Filter.__init__(self)
+        self.levels = {name: get_level(level) for name, level in levels.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.levels.get(record.module, logging.NOTSET)
+
+
+class ChannelMirror(logging.Handler):
+
+    """
+    Collects the formatted records in the listener's thread, `send_periodically` sends them to the log channel from
+    the event loop. If more records come in than fit into the buffer the oldest ones are dropped
+    """
+
+    def __init__(self, level: int = logging.WARNING, size: int = 100):
+        logging.Handler.__init__(self, level)
+        self.records: deque[str] = deque(maxlen=size)
+        self.dropped = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # a failed mirror message would be mirrored again
+        if record.module == "outbound":
+            return
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append(self.format(record))
+
+    def send(self, bot: commands.Bot) -> None:
+        lines = []
+        while self.records:
+            lines.append(self.records.popleft())
+        dropped, self.dropped = self.dropped, 0
+        if not lines:
+            return
+
+        channel = bot.get_channel(config.LOG_CHANNEL_ID)
+        if channel is None:
+            return
+
+        text = "\n".join(lines).replace("```", "`\u200B`\u200B`")
+        description = "%i record(s)%s\n```\n%s```" % (
+            len(lines), ", %i dropped" % dropped if dropped else "", text[:3900]
+        )
+        outbound.post(
+            channel, outbound.Priority.DIAGNOSTICS,
+            embed=embed_message(title="Log", description=description, color=config.COLOR.WARNING),
+            file=discord.File(io.BytesIO(text.encode("utf-8")), filename="log.txt") if len(text) > 3900 else None
+        )
+
+    async def send_periodically(self, bot: commands.Bot, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.send(bot)
+
+
+def setup(
+    level: Union[int, str] = config.LOG_LEVEL,
+    levels: Mapping[str, Union[int, str]] = config.LOG_LEVELS,
+    mirror: bool = config.LOG_MIRROR_INTERVAL > 0
+) -> None:
+    """
+    Replaces the handlers of the root logger with the queue
+    @param level: level of the root logger
+    @param levels: levels of loggers by name, e.g. `discord`, and of the bot's modules by module name, e.g. `ts_news`
+    @param mirror: whether `MIRROR` collects records for the log channel, the task sending them is started by the bot
+    """
+    global LISTENER, MIRROR
+    stop()
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter(FORMAT))
+    handlers: list[logging.Handler] = [stream]
+
+    MIRROR = None
+    if mirror:
+        MIRROR = ChannelMirror(get_level(config.LOG_MIRROR_LEVEL))
+        MIRROR.setFormatter(logging.Formatter(MIRROR_FORMAT))
+        handlers.append(MIRROR)
+
+    handler = LazyQueueHandler(queue.SimpleQueue())
+    handler.addFilter(ModuleLevelFilter(levels))
+    logging.basicConfig(level=get_level(level), handlers=[handler], force=True)
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(get_level(module_level))
+
+    LISTENER = logging.handlers.QueueListener(handler.queue, *handlers, respect_handler_level=True)
+    LISTENER.start()
+
+
+def stop() -> None:
+    """Writes the records left in the queue and stops the listener"""
+    global LISTENER
+    if LISTENER is not None:
+        LISTENER.stop()
+        LISTENER = None
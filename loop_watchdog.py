@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+import metrics
+from sampler import collapse, frame_name, walk_stack
+
+# not reloaded by reloader.py, the watchdog thread would keep running
+RELOADABLE = False
+
+# set by main.py, so the debug cog can report it
+WATCHDOG: Optional["LoopWatchdog"] = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+LOOP_LAG_SECONDS = metrics.REGISTRY.histogram(
+    "bot_loop_lag_seconds", "Delay of the event loop heartbeat",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+LOOP_STALLS = metrics.REGISTRY.counter("bot_loop_stalls_total", "Times the event loop was blocked longer than the threshold")
+
+
+class HotSpot:
+
+    """The stalls which were blocked in the same function of the bot"""
+
+    __slots__ = ("name", "count", "total", "max", "stacks", "last_seen")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.stacks: Counter[str] = Counter()
+        self.last_seen = 0.0
+
+    def copy(self) -> "HotSpot":
+        spot = HotSpot(self.name)
+        spot.count, spot.total, spot.max, spot.last_seen = self.count, self.total, self.max, self.last_seen
+        spot.stacks = self.stacks.copy()
+        return spot
+
+
+class LoopWatchdog:
+
+    """
+    A heartbeat task measures how late the event loop wakes it up. A helper thread watches the heartbeat and when it
+    is older than `threshold`, it captures the stack of the loop's thread, which is the code blocking the loop.
+    Stalls are aggregated by the innermost frame of the bot's own files. The thread writes them under `lock`, the loop
+    only reads copies
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self.hotspots: dict[str, HotSpot] = {}
+        self.lock = threading.Lock()
+        self.last_beat = time.monotonic()
+        self.loop_thread_id: Optional[int] = None
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self) -> None:
+        """Starts the watchdog for the running loop"""
+        if self.running:
+            return
+
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.__stop.clear()
+        self.__task = asyncio.get_running_loop().create_task(self.__heartbeat())
+        self.__thread = threading.Thread(target=self.__watch, name="loop-watchdog", daemon=True)
+        self.__thread.start()
+        logging.info("Loop watchdog started with a threshold of %sms", self.threshold * 1000)
+
+    def stop(self) -> None:
+        self.__stop.set()
+        if self.__task is not None:
+            self.__task.cancel()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    async def __heartbeat(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.last_beat = time.monotonic()
+            LOOP_LAG_SECONDS.observe(max(self.last_beat - start - self.interval, 0))
+
+    def __watch(self) -> None:
+        # stack samples and the longest blocked time of the current stall
+        samples: Counter[str] = Counter()
+        spot_names: Counter[str] = Counter()
+        blocked_for = 0.0
+
+        while not self.__stop.wait(self.interval / 2):
+            blocked = time.monotonic() - self.last_beat - self.interval
+            if blocked < self.threshold:
+                if samples:
+                    self.__record(spot_names.most_common(1)[0][0], samples, blocked_for)
+                    samples = Counter()
+                    spot_names = Counter()
+                    blocked_for = 0.0
+                continue
+
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+
+            stack = walk_stack(frame)
+            samples[collapse(stack)] += 1
+            spot_names[self.hot_frame(stack)] += 1
+            blocked_for = blocked
+            del frame, stack
+
+    def __record(self, name: str, samples: Counter, blocked_for: float) -> None:
+        with self.lock:
+            spot = self.hotspots.get(name)
+            if spot is None:
+                spot = self.hotspots[name] = HotSpot(name)
+
+            spot.count += 1
+            spot.total += blocked_for
+            spot.max = max(spot.max, blocked_for)
+            spot.stacks.update(samples)
+            spot.last_seen = time.time()
+        LOOP_STALLS.inc()
+        logging.warning("Event loop was blocked for %.0fms in %s", blocked_for * 1000, name)
+
+    @staticmethod
+    def hot_frame(stack: list) -> str:
+        """Returns the innermost frame which is in a file of the bot, otherwise the innermost frame"""
+        for frame in reversed(stack):
+            path = os.path.abspath(frame.f_code.co_filename)
+            if path.startswith(ROOT + os.sep) and path != os.path.abspath(__file__):
+                return frame_name(frame)
+        return frame_name(stack[-1]) if stack else "unknown"
+
+    def top(self, n: int = 10) -> list[HotSpot]:
+        with self.lock:
+            spots = [spot.copy() for spot in self.hotspots.values()]
+        return sorted(spots, key=lambda s: s.total, reverse=True)[:n]
+
+    def collapsed(self) -> str:
+        """Returns the stacks sampled during all stalls in the collapsed format of flamegraph.pl"""
+        stacks: Counter[str] = Counter()
+        with self.lock:
+            for spot in self.hotspots.values():
+                stacks.update(spot.stacks)
+        return "\n".join("%s %i" % (stack, count) for stack, count in stacks.most_common())
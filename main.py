@@ -1,40 +1,41 @@
+from startup import StartupManager  # first, to measure the startup time
+
+import asyncio
 import json
+import sys
+import time
 import traceback
 from functions import embed_command_error_msg, embed_message, pythonize_json, report_error
 import logging
 
 import discord
 from discord.ext import commands
-from discord.ext.commands.errors import CommandError, ConversionError, ExpectedClosingQuoteError, ExtensionError, InvalidEndOfQuotedStringError, MissingRequiredArgument, UnexpectedQuoteError, UserInputError
+from discord.ext.commands.errors import CommandError, ConversionError, ExpectedClosingQuoteError, InvalidEndOfQuotedStringError, MissingRequiredArgument, UnexpectedQuoteError, UserInputError
 
 import config
+import error_reports
+import logs
+import loop_watchdog
+import metrics
+import outbound
 from help_command import HelpCommand
+from restart import restore_snapshot
 
-# set other loggers on error
-dc_logger = logging.getLogger(name="discord")
-dc_logger.setLevel(level=logging.CRITICAL)
-
-aiohttp_logger = logging.getLogger(name="aiohttp")
-aiohttp_logger.setLevel(level=logging.CRITICAL)
+logs.setup()
+logging.addLevelName(25, "BOTCODECHANGE")
 
-urllib3_logger = logging.getLogger(name="urllib3")
-urllib3_logger.setLevel(level=logging.CRITICAL)
+logging.info("All modules imported")
+logging.info("Status: %s", config.STATUS)
+logging.info("Prefix: %s", config.PREFIX)
 
-asyncio_logger = logging.getLogger(name="asyncio")
-asyncio_logger.setLevel(level=logging.CRITICAL)
+class Bot(commands.Bot):
 
-logging.basicConfig(
-    level=logging.DEBUG, 
-    format='%(asctime)s | %(levelname)s: %(filename)s - %(lineno)s: %(msg)s', 
-    force=True
-)
-logging.addLevelName(25, "BOTCODECHANGE")
+    async def get_context(self, message, *, cls=outbound.ScheduledContext):
+        # replies to commands are sent before queued news and reports
+        return await commands.Bot.get_context(self, message, cls=cls)
 
-logging.info("All modules imported")
-logging.info("Status: %s" % config.STATUS)
-logging.info("Prefix: %s" % config.PREFIX)
 
-bot = commands.Bot(
+bot = Bot(
     command_prefix=config.PREFIX,
     status=getattr(discord.Status, config.STATUS),
     activity=config.ACTIVITY,
@@ -43,10 +44,55 @@ bot = commands.Bot(
 )
 
 
+startup = StartupManager(bot, config.EXTENSIONS)
+loop_watchdog.WATCHDOG = loop_watchdog.LoopWatchdog(config.WATCHDOG_INTERVAL, config.WATCHDOG_THRESHOLD)
+
+
+async def on_config_change(old: config.ConfigSnapshot, new: config.ConfigSnapshot) -> None:
+    bot.command_prefix = new.PREFIX
+    bot.owner_ids = new.OWNER_IDS
+
+    if old.STATUS != new.STATUS or old.data["activity"] != new.data["activity"]:
+        await bot.change_presence(status=getattr(discord.Status, new.STATUS), activity=new.ACTIVITY)
+
+
+config.SERVICE.subscribe(on_config_change)
+
+metrics.REGISTRY.gauge("bot_latency_seconds", "Latency of the discord websocket").set_function(lambda: bot.latency)
+metrics.REGISTRY.gauge("bot_guilds", "Guilds the bot is in").set_function(lambda: len(bot.guilds))
+
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.invoked_at = time.perf_counter()
+
+
+@bot.after_invoke
+async def observe_command_time(ctx):
+    name = ctx.command.qualified_name
+    metrics.COMMAND_SECONDS.observe(time.perf_counter() - getattr(ctx, "invoked_at", time.perf_counter()), command=name)
+    if ctx.command_failed:
+        metrics.COMMAND_ERRORS.inc(command=name)
+
+
 @bot.event
 async def on_ready():
     logging.info("Bot has been started and is active")
 
+    loop_watchdog.WATCHDOG.start()
+
+    # extensions are loaded once after the first connect
+    if await startup.load():
+        config.SERVICE.start()
+        asyncio.get_running_loop().create_task(
+            metrics.REGISTRY.write_periodically(config.METRICS_FILE, config.METRICS_WRITE_INTERVAL)
+        )
+        if logs.MIRROR is not None:
+            asyncio.get_running_loop().create_task(logs.MIRROR.send_periodically(bot, config.LOG_MIRROR_INTERVAL))
+        # state of the process before a restart command
+        restore_snapshot(bot)
+        await startup.send_report()
+
 
 #@bot.listen("on_message")
 #async def on_message_event_handler(msg: discord.Message):
@@ -71,23 +117,28 @@ async def on_resumed():
 
 @bot.event
 async def on_error(event: str, *args, **kwargs):
-    logging.error("Error in event '%s' with args '%s' and kwargs '%s'" % (event, args, kwargs))
+    logging.error("Error in event '%s' with args '%s' and kwargs '%s'", event, args, kwargs)
     channel =  bot.get_channel(config.LOG_CHANNEL_ID)
 
     if channel is None:
-        logging.warning("Could not find channel with id %s" % config.LOG_CHANNEL_ID)
+        logging.warning("Could not find channel with id %s", config.LOG_CHANNEL_ID)
         return
     
     elif event == "on_command_error":
         logging.critical("ERROR IN ON_COMMAND_ERROR. NEEDS TO DEBUG")
-        await channel.send("<@&%\u200Bi>" % config.ROLES["developer"]["id"], embed=embed_message(
+        outbound.post(channel, outbound.Priority.DIAGNOSTICS, content="<@&%\u200Bi>" % config.ROLES["developer"]["id"], embed=embed_message(
             title="Error",
             description="An error in the `on_command_error`-event occurred.",
             color=config.COLOR.ERROR
         ))
         return
 
-    await channel.send(
+    error = sys.exc_info()[1]
+    if error is not None and error_reports.REPORTER.submit(bot, error, config.LOG_CHANNEL_ID) is None:
+        return
+
+    outbound.post(
+        channel, outbound.Priority.DIAGNOSTICS,
         embed=embed_message(
             title="Error in event '%s'" % event,
             description="Args: \n" + '\n'.join(str(x) for x in args) + "\nKwargs: \n" + pythonize_json(json.dumps(kwargs)),
@@ -153,18 +204,4 @@ async def test():
     raise ConversionError("fjdk", 1234)
 
 
-# loading extensions
-logging.info("Loading extensions")
-
-for ext_name in config.EXTENSIONS:
-    try:
-        bot.load_extension("cogs.%s" % ext_name)
-    except ExtensionError as err:
-        logging.warning("failed to load extension '%s' beacuse of '%s'" % (ext_name, str(err)))
-    else:
-        logging.info("Extension '%s' loaded" % ext_name)
-
-
-logging.info("Loaded extensions")
-
 bot.run(config.TOKEN)
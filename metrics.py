@@ -0,0 +1,239 @@
+import asyncio
+import bisect
+import functools
+import inspect
+import logging
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+# not reloaded by reloader.py, the other modules registered their metrics in this registry
+RELOADABLE = False
+
+# upper bounds in seconds, from a fast command to a slow news cycle
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def label_key(labels: dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def format_labels(key: LabelKey, extra: str = "") -> str:
+    parts = ['%s="%s"' % (k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{%s}" % ",".join(parts) if parts else ""
+
+
+class Counter:
+
+    """A value which only goes up, e.g. the number of errors"""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.values: dict[LabelKey, float] = {}
+        # the watchdog and the storage threads update metrics as well
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[tuple[str, float]]:
+        with self.lock:
+            values = list(self.values.items())
+        for key, value in values:
+            yield self.name + format_labels(key), value
+
+
+class Gauge(Counter):
+
+    """A value which goes up and down. It can be read from a function when the metrics are collected"""
+
+    TYPE = "gauge"
+
+    def __init__(self, name: str, help: str = ""):
+        Counter.__init__(self, name, help)
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        key = label_key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.function = function
+
+    def samples(self) -> Iterable[tuple[str, float]]:
+        if self.function is not None:
+            try:
+                self.set(self.function())
+            except Exception as e:
+                logging.debug("Gauge %s could not be read: %s", self.name, e)
+        return Counter.samples(self)
+
+
+class Histogram:
+
+    """Counts observed values, e.g. durations, in buckets with fixed upper bounds"""
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [count per bucket + one for +Inf, sum, count]
+        self.values: dict[LabelKey, list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = label_key(labels)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+            data[0][bucket] += 1
+            data[1] += value
+            data[2] += 1
+
+    def time(self, **labels) -> "Timer":
+        """Returns a context manager observing the time its block took"""
+        return Timer(self, labels)
+
+    def totals(self) -> list[tuple[LabelKey, float, int]]:
+        """Returns the sum and the count of every label key"""
+        with self.lock:
+            return [(key, total, count) for key, (_, total, count) in self.values.items()]
+
+    def quantile(self, q: float, key: LabelKey = ()) -> float:
+        """Estimates the quantile as the upper bound of the bucket it is in"""
+        with self.lock:
+            data = self.values.get(key)
+            if data is None or not data[2]:
+                return 0.0
+            counts, total = list(data[0]), data[2]
+
+        rank = q * total
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def samples(self) -> Iterable[tuple[str, float]]:
+        with self.lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self.values.items()]
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield self.name + "_bucket" + format_labels(key, 'le="%s"' % bound), cumulative
+            yield self.name + "_bucket" + format_labels(key, 'le="+Inf"'), count
+            yield self.name + "_sum" + format_labels(key), total
+            yield self.name + "_count" + format_labels(key), count
+
+
+class Timer:
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: dict[str, object]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics: dict[str, object] = {}
+
+    def __get(self, cls, name: str, help: str, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name, help, **kwargs)
+        elif type(metric) is not cls:
+            raise ValueError("Metric %s is already registered as %s" % (name, type(metric).TYPE))
+        return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self.__get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self.__get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.__get(Histogram, name, help, buckets=buckets)
+
+    def to_prometheus(self) -> str:
+        """Returns all metrics in the Prometheus text format"""
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            if metric.help:
+                lines.append("# HELP %s %s" % (name, metric.help))
+            lines.append("# TYPE %s %s" % (name, metric.TYPE))
+            lines.extend("%s %s" % (sample, repr(float(value))) for sample, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    async def write_prometheus(self, path: str) -> None:
+        # storage imports this module
+        import storage
+        # rendered on the loop, gauge functions may read objects of the loop; the collector may read at any time, so
+        # the file is replaced at once in a thread of the storage
+        await storage.STORAGE.save_text(path, self.to_prometheus())
+
+    async def write_periodically(self, path: str, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.write_prometheus(path)
+            except OSError as e:
+                logging.warning("Could not write metrics to %s: %s", path, e)
+
+
+REGISTRY = Registry()
+
+COMMAND_SECONDS = REGISTRY.histogram("bot_command_seconds", "Time from invoking a command until it finished")
+COMMAND_ERRORS = REGISTRY.counter("bot_command_errors_total", "Commands which raised an error")
+LOOP_SECONDS = REGISTRY.histogram("bot_loop_seconds", "Duration of one iteration of a background loop")
+JSON_WRITE_SECONDS = REGISTRY.histogram("bot_json_write_seconds", "Duration of updating a json data file")
+ERRORS_REPORTED = REGISTRY.counter("bot_errors_reported_total", "Errors reported to the log channel")
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """Decorator observing the duration of every call of a function or coroutine function"""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time(**labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
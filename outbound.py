@@ -0,0 +1,184 @@
+"""
+Central scheduler for messages sent to discord. Requests are started by priority, so replies to commands are not stuck
+behind a burst of news posts or error reports. Only one request per rate limit route is in flight at a time and the
+number of requests in flight overall is limited, the rate limits themselves are still handled by discord.py
+"""
+import asyncio
+import enum
+import functools
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+import discord
+from discord.ext import commands
+
+import config
+import metrics
+
+
+# not reloaded by reloader.py, queued and running requests belong to SCHEDULER
+RELOADABLE = False
+
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0  # replies to commands
+    PAGINATION = 1  # edits of pages and menus
+    NEWS = 2
+    DIAGNOSTICS = 3  # the log channel
+
+
+OUTBOUND_WAIT_SECONDS = metrics.REGISTRY.histogram(
+    "bot_outbound_wait_seconds", "Time a message request waited in the outbound queue"
+)
+OUTBOUND_DROPPED = metrics.REGISTRY.counter(
+    "bot_outbound_dropped_total", "Fire-and-forget message requests dropped because their queue was full"
+)
+
+
+def route_of(target: Any, kind: str = "send") -> str:
+    """
+    Returns the rate limit route of a request, discord limits sending and editing messages per channel
+    @param target: a channel, context or message
+    @param kind: the kind of request, e.g. `send` or `edit`
+    """
+    channel = target.channel if isinstance(target, (commands.Context, discord.Message)) else target
+    return "%s:%s" % (kind, getattr(channel, "id", 0))
+
+
+class OutboundRequest:
+
+    __slots__ = ("func", "route", "priority", "future", "queued_at")
+
+    def __init__(self, func: Callable[[], Awaitable], route: str, priority: Priority, future: asyncio.Future):
+        self.func = func
+        self.route = route
+        self.priority = priority
+        self.future = future
+        self.queued_at = time.perf_counter()
+
+
+class OutboundScheduler:
+
+    def __init__(self, concurrency: int = 4, queue_size: int = 100):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue: list[tuple[int, int, OutboundRequest]] = []
+        self.pending: dict[Priority, int] = dict.fromkeys(Priority, 0)
+        self.waiters: dict[Priority, deque[asyncio.Future]] = {p: deque() for p in Priority}
+        self.busy: set[str] = set()
+        self.running = 0
+        self.__counter = itertools.count()
+
+    def submit(self, func: Callable[[], Awaitable], route: str, priority: Priority) -> asyncio.Future:
+        """
+        Queues the request without waiting for it
+        @raise asyncio.QueueFull: too many requests of the priority are queued
+        @return: the future of the result of `func`
+        @rtype: asyncio.Future
+        """
+        if self.pending[priority] >= self.queue_size:
+            raise asyncio.QueueFull("%i %s requests are queued" % (self.pending[priority], priority.name))
+
+        future = asyncio.get_running_loop().create_future()
+        request = OutboundRequest(func, route, priority, future)
+        heapq.heappush(self.queue, (priority, next(self.__counter), request))
+        self.pending[priority] += 1
+        self.__dispatch()
+        return future
+
+    async def call(self, func: Callable[[], Awaitable], route: str, priority: Priority) -> Any:
+        """Queues the request, waiting for room in the queue first, and returns its result"""
+        while self.pending[priority] >= self.queue_size:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters[priority].append(waiter)
+            await waiter
+        return await self.submit(func, route, priority)
+
+    def __dispatch(self) -> None:
+        skipped = []
+        while self.queue and self.running < self.concurrency:
+            item = heapq.heappop(self.queue)
+            request = item[2]
+            if request.future.cancelled():
+                self.__dequeued(request.priority)
+            elif request.route in self.busy:
+                skipped.append(item)
+            else:
+                self.__dequeued(request.priority)
+                self.busy.add(request.route)
+                self.running += 1
+                asyncio.ensure_future(self.__execute(request))
+
+        for item in skipped:
+            heapq.heappush(self.queue, item)
+
+    def __dequeued(self, priority: Priority) -> None:
+        self.pending[priority] -= 1
+        waiters = self.waiters[priority]
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    async def __execute(self, request: OutboundRequest) -> None:
+        OUTBOUND_WAIT_SECONDS.observe(time.perf_counter() - request.queued_at, priority=request.priority.name)
+        try:
+            result = await request.func()
+        except Exception as e:
+            if not request.future.done():
+                request.future.set_exception(e)
+        else:
+            if not request.future.done():
+                request.future.set_result(result)
+        finally:
+            self.busy.discard(request.route)
+            self.running -= 1
+            self.__dispatch()
+
+
+SCHEDULER = OutboundScheduler(config.OUTBOUND_CONCURRENCY, config.OUTBOUND_QUEUE_SIZE)
+
+
+def _log_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logging.warning("Outbound message failed: %s", future.exception())
+
+
+async def send(target: discord.abc.Messageable, priority: Priority, **kwargs) -> discord.Message:
+    """Sends the message through the scheduler and waits until it is sent"""
+    return await SCHEDULER.call(functools.partial(target.send, **kwargs), route_of(target), priority)
+
+
+async def edit(message: discord.Message, priority: Priority, **kwargs) -> None:
+    await SCHEDULER.call(functools.partial(message.edit, **kwargs), route_of(message, "edit"), priority)
+
+
+def post(target: discord.abc.Messageable, priority: Priority, **kwargs) -> Optional[asyncio.Future]:
+    """
+    Sends the message through the scheduler without waiting, failures are only logged
+    @return: the future of the message, None if the queue was full and the message was dropped
+    @rtype: Optional[asyncio.Future]
+    """
+    try:
+        future = SCHEDULER.submit(functools.partial(target.send, **kwargs), route_of(target), priority)
+    except asyncio.QueueFull as e:
+        OUTBOUND_DROPPED.inc(priority=priority.name)
+        logging.warning("Dropped outbound message: %s", e)
+        return None
+    future.add_done_callback(_log_failure)
+    return future
+
+
+class ScheduledContext(commands.Context):
+
+    """Context whose replies go through the scheduler with the highest priority"""
+
+    async def send(self, *args, **kwargs) -> discord.Message:
+        return await SCHEDULER.call(
+            functools.partial(commands.Context.send, self, *args, **kwargs), route_of(self), Priority.INTERACTIVE
+        )
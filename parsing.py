@@ -0,0 +1,143 @@
+"""
+Parsing of the news pages. The functions take and return plain data, so they can run in a thread or process pool
+without blocking the event loop
+"""
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+import time
+from typing import Any, Callable, Optional
+
+import discord
+
+import config
+import metrics
+from errors import ElementNotFound
+from functions import html_to_dc_md, skip
+from startup import lazy_import
+
+# not reloaded by reloader.py, the pool would be created again
+RELOADABLE = False
+
+bs4 = lazy_import("bs4")
+
+PARSE_SECONDS = metrics.REGISTRY.histogram("bot_parse_seconds", "Duration of parsing and rendering a news page")
+
+_executor: Optional[concurrent.futures.Executor] = None
+
+
+def get_executor() -> Optional[concurrent.futures.Executor]:
+    """Returns the pool configured by `config.PARSE_EXECUTOR`, None runs the functions on the event loop"""
+    global _executor
+    if _executor is None and config.PARSE_EXECUTOR == "process":
+        # fork: spawn and forkserver would import main.py again and start a second bot
+        _executor = concurrent.futures.ProcessPoolExecutor(
+            config.PARSE_WORKERS, mp_context=multiprocessing.get_context("fork")
+        )
+    elif _executor is None and config.PARSE_EXECUTOR == "thread":
+        _executor = concurrent.futures.ThreadPoolExecutor(config.PARSE_WORKERS, thread_name_prefix="parse")
+    return _executor
+
+
+async def run(func: Callable, *args) -> Any:
+    """Runs the parse function in the pool and observes its duration"""
+    start = time.perf_counter()
+    try:
+        if config.PARSE_EXECUTOR == "none":
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), functools.partial(func, *args))
+    finally:
+        PARSE_SECONDS.observe(time.perf_counter() - start, function=func.__name__)
+
+
+def find_gmo_articles(html: str) -> list[dict[str, Any]]:
+    """
+    Returns the articles of the gmo news page
+    @return: dicts with the `html` of the article, its `link` and `date`, which is None if it is missing
+    @rtype: list[dict[str, Any]]
+    """
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    articles = []
+    for article in soup.find_all(class_="newseintrag"):
+        date = article.find(class_="datum")
+        articles.append({
+            "html": repr(article),
+            "link": article.find(class_="titel").find("a", href=True)["href"],
+            "date": None if date is None else date.text
+        })
+    return articles
+
+
+def render_gmo_article(html: str, no_text_tags: tuple[str, ...] = ("img", "video")) -> list[dict[str, Any]]:
+    """
+    Converts a gmo article into embeds, returned as dicts of `discord.Embed.to_dict`. Color, footer and timestamp are
+    left to the caller
+    """
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    article_div = soup.find("div")
+
+    if article_div is None:
+        raise ElementNotFound("div element from gmo article was not found")
+
+    embeds: list[discord.Embed] = []
+    at_embed: int = 0
+    child: "bs4.Tag"
+    for i, child in enumerate(article_div.children, start=0):  # type: ignore
+        if i <= 1 or child.name is None:
+            continue
+
+        if at_embed == len(embeds):
+            embeds.append(discord.Embed(title=config.EMPTY_CHAR))
+
+        in_child = [x for x in child.children if x.name]  # type: ignore
+
+        inner_child = ""  # type: ignore
+        if len(in_child) == 1:
+            inner_child: "bs4.Tag" = in_child[0]  # type: ignore
+
+        if getattr(inner_child, "name", "") in no_text_tags:
+            if inner_child.name == "img":
+                embeds.append(discord.Embed(
+                    title=v if (v := inner_child.attrs.get("alt")) else inner_child.attrs["src"],
+                ).set_image(url=inner_child.attrs["src"]))
+            elif inner_child.name == "video":
+                embeds[-1].add_field(
+                    name=config.EMPTY_CHAR,
+                    value="[Video](%s)" % inner_child.attrs["src"],
+                    inline=False
+                )
+
+        else:
+            fp = html_to_dc_md(repr(child))
+            if not fp.strip():
+                continue
+
+            elif embeds[at_embed].description == discord.Embed.Empty:
+                embeds[at_embed].description = skip(fp, 2000)
+            else:
+                embeds[at_embed].add_field(name=config.EMPTY_CHAR, value=skip(fp, 1024), inline=False)
+    try:
+        embeds[0].title = article_div.find("p", class_="titel").find("a", text=True).text  # type: ignore
+    except Exception as e:
+        embeds[0].title = "Error: " + str(e)
+
+    embeds[0].url = article_div.find("p", class_="titel").find("a", href=True)["href"]  # type: ignore
+    return [e.to_dict() for e in embeds]
+
+
+def find_important_news(html: str) -> list[dict[str, Optional[str]]]:
+    """
+    Returns the important news (Eilmeldungen) of the tagesschau page
+    @return: dicts with an `id` and the `text` of the link, which is None if there is no link
+    @rtype: list[dict[str, Optional[str]]]
+    """
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    news = []
+    for n in soup.find_all("div", class_="eilmeldung"):
+        link = bs4.BeautifulSoup(repr(n), "html.parser").find("a")
+        news.append({
+            "id": repr(link),
+            "text": link.text if isinstance(link, bs4.element.Tag) else None
+        })
+    return news
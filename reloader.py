@@ -0,0 +1,188 @@
+import ast
+import importlib
+import logging
+import os
+import sys
+import time
+from graphlib import TopologicalSorter
+from types import ModuleType
+from typing import Any, Iterable, Optional
+
+from discord.ext import commands
+
+# reloading it would reset MANAGER
+RELOADABLE = False
+
+# set by the debug cog, so the reload functions of the modules can use it
+MANAGER: Optional["ReloadManager"] = None
+
+
+class ReloadManager:
+
+    """
+    Reloads modules of the bot together with every module importing them, dependencies first. Extensions are reloaded
+    with the bot, and the attributes a cog names in `PERSISTENT_STATE` are moved to the new cog instance. Modules
+    setting `RELOADABLE = False` hold running state like threads or queues and are left out, they need a restart
+    """
+
+    def __init__(self, bot: commands.Bot, root: str = os.path.dirname(os.path.abspath(__file__))):
+        self.bot = bot
+        self.root = root
+        # path -> (mtime, imported module names)
+        self.__imports: dict[str, tuple[float, set[str]]] = {}
+
+    def project_modules(self) -> dict[str, ModuleType]:
+        """Returns the loaded modules which are files of the bot"""
+        modules = {}
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if name != "__main__" and path and os.path.abspath(path).startswith(self.root + os.sep):
+                modules[name] = module
+        return modules
+
+    def imports_of(self, module: ModuleType) -> set[str]:
+        """Returns the names of all modules imported by the source of the module. The result is cached until the file changes"""
+        path = module.__file__
+        mtime = os.stat(path).st_mtime
+        cached = self.__imports.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+
+        package = module.__name__ if hasattr(module, "__path__") else module.__name__.rpartition(".")[0]
+        names = set()
+        for node in self.__module_level(tree):
+            if isinstance(node, ast.Import):
+                names.update(alias.name for alias in node.names)
+
+            elif isinstance(node, ast.ImportFrom):
+                base = node.module or ""
+                if node.level:
+                    parent = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                    base = parent + "." + base if base else parent
+
+                names.add(base)
+                # `from package import module`
+                names.update(base + "." + alias.name for alias in node.names)
+
+        self.__imports[path] = (mtime, names)
+        return names
+
+    @staticmethod
+    def __module_level(tree: ast.AST) -> Iterable[ast.AST]:
+        """Yields the nodes executed on import, imports inside of functions don't bind names of the module"""
+        todo = [tree]
+        while todo:
+            node = todo.pop()
+            yield node
+            todo.extend(
+                child for child in ast.iter_child_nodes(node)
+                if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda))
+            )
+
+    def graph(self) -> dict[str, set[str]]:
+        """Maps every module of the bot to the modules of the bot it imports"""
+        modules = self.project_modules()
+        return {name: self.imports_of(module) & modules.keys() - {name} for name, module in modules.items()}
+
+    @staticmethod
+    def is_reloadable(name: str) -> bool:
+        return getattr(sys.modules.get(name), "RELOADABLE", True)
+
+    def dependents(self, names: Iterable[str], graph: Optional[dict[str, set[str]]] = None) -> set[str]:
+        """
+        Returns the modules and all modules which import them directly or indirectly. Modules which are not reloadable
+        are skipped, and so are the modules only importing them, they keep using the old objects
+        """
+        if graph is None:
+            graph = self.graph()
+
+        importers: dict[str, set[str]] = {}
+        for name, imports in graph.items():
+            for imported in imports:
+                importers.setdefault(imported, set()).add(name)
+
+        result = set()
+        todo = list(names)
+        while todo:
+            name = todo.pop()
+            if name not in result and self.is_reloadable(name):
+                result.add(name)
+                todo.extend(importers.get(name, ()))
+        return result
+
+    def plan(self, names: Iterable[str]) -> list[str]:
+        """Returns the modules which need to be reloaded in the order they are reloaded"""
+        graph = self.graph()
+        unknown = [n for n in names if n not in graph]
+        if unknown:
+            raise ModuleNotFoundError("Module(s) %s are not loaded modules of the bot" % ", ".join(unknown))
+
+        running = [n for n in names if not self.is_reloadable(n)]
+        if running:
+            raise ValueError("Module(s) %s keep running state and can't be reloaded, restart the bot instead" % ", ".join(running))
+
+        affected = self.dependents(names, graph)
+        return list(TopologicalSorter({n: graph[n] & affected for n in affected}).static_order())
+
+    def check(self) -> dict[str, Exception]:
+        """
+        Plans the reload of every reloadable module of the bot, so import cycles are found before a reload needs them
+        @return: the modules which can't be reloaded with the error of their plan
+        @rtype: dict[str, Exception]
+        """
+        errors = {}
+        for name in self.graph():
+            if self.is_reloadable(name):
+                try:
+                    self.plan([name])
+                except Exception as e:
+                    errors[name] = e
+        return errors
+
+    def reload(self, names: Iterable[str]) -> list[str]:
+        """
+        Reloads the modules and their dependents
+        @return: the reloaded modules in the order they were reloaded
+        @rtype: list[str]
+        """
+        start = time.perf_counter()
+        order = self.plan(names)
+
+        for name in order:
+            if name in self.bot.extensions:
+                self.reload_extension(name)
+            else:
+                importlib.reload(sys.modules[name])
+
+        logging.log(25, "Reloaded %s in %.1fms", ", ".join(order), (time.perf_counter() - start) * 1000)
+        return order
+
+    def reload_extension(self, name: str) -> None:
+        states = {
+            cog_name: self.get_state(cog)
+            for cog_name, cog in self.bot.cogs.items()
+            if type(cog).__module__ == name
+        }
+
+        self.bot.reload_extension(name)
+
+        for cog_name, state in states.items():
+            cog = self.bot.get_cog(cog_name)
+            if cog is not None:
+                for attr, value in state.items():
+                    setattr(cog, attr, value)
+
+    @staticmethod
+    def get_state(cog: commands.Cog) -> dict[str, Any]:
+        return {attr: getattr(cog, attr) for attr in getattr(cog, "PERSISTENT_STATE", ()) if hasattr(cog, attr)}
+
+
+def reload_module(name: str) -> str:
+    """Reloads the module with its dependents if the manager is set up, otherwise only the module itself"""
+    if MANAGER is None:
+        importlib.reload(sys.modules[name])
+        return name
+    return ", ".join(MANAGER.reload([name]))
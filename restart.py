@@ -0,0 +1,89 @@
+import logging
+import os
+import pickle
+import sys
+import time
+from typing import Any
+
+from discord.ext import commands
+
+import config
+import logs
+
+
+def save_snapshot(bot: commands.Bot, path: str = config.RESTART_SNAPSHOT_FILE) -> int:
+    """
+    Pickles the attributes every cog lists in `SNAPSHOT_STATE`. Attributes which cannot be pickled are skipped
+    @return: the number of saved attributes
+    @rtype: int
+    """
+    state: dict[str, dict[str, bytes]] = {}
+    for cog_name, cog in bot.cogs.items():
+        for attr in getattr(cog, "SNAPSHOT_STATE", ()):
+            try:
+                state.setdefault(cog_name, {})[attr] = pickle.dumps(getattr(cog, attr), pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logging.warning("Could not snapshot %s.%s: %s", cog_name, attr, e)
+
+    # write to a temporary file first, so a crash never leaves a half written snapshot
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"time": time.time(), "state": state}, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    count = sum(len(x) for x in state.values())
+    logging.info("Saved %i attribute(s) of %i cog(s) for the restart", count, len(state))
+    return count
+
+
+def restore_snapshot(bot: commands.Bot, path: str = config.RESTART_SNAPSHOT_FILE) -> int:
+    """
+    Restores the attributes saved by `save_snapshot` into the loaded cogs and removes the snapshot. Snapshots older than
+    `config.RESTART_SNAPSHOT_MAX_AGE` are ignored, the data files are newer then
+    @return: the number of restored attributes
+    @rtype: int
+    """
+    try:
+        with open(path, "rb") as f:
+            snapshot: dict[str, Any] = pickle.load(f)
+    except FileNotFoundError:
+        return 0
+    except Exception as e:
+        logging.warning("Could not read the restart snapshot: %s", e)
+        snapshot = {"time": 0, "state": {}}
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    age = time.time() - snapshot["time"]
+    if age > config.RESTART_SNAPSHOT_MAX_AGE:
+        logging.info("Ignored restart snapshot which is %is old", age)
+        return 0
+
+    count = 0
+    for cog_name, attrs in snapshot["state"].items():
+        cog = bot.get_cog(cog_name)
+        if cog is None:
+            continue
+
+        for attr, data in attrs.items():
+            try:
+                setattr(cog, attr, pickle.loads(data))
+            except Exception as e:
+                logging.warning("Could not restore %s.%s: %s", cog_name, attr, e)
+            else:
+                count += 1
+
+    logging.info("Restored %i attribute(s) from the restart snapshot (%.1fs old)", count, age)
+    return count
+
+
+def exec_self() -> None:
+    """Replaces the process with a new instance of the bot started with the same arguments"""
+    logging.info("Restarting process")
+    # exec does not run atexit, the records still queued would be lost
+    logs.stop()
+    logging.shutdown()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
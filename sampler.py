@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+from typing import Iterable, Optional
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return "%s (%s:%i)" % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+
+def collapse(frames: Iterable[FrameType]) -> str:
+    """Joins frames ordered from the root to the leaf in the collapsed stack format of flamegraph.pl"""
+    return ";".join(frame_name(f) for f in frames)
+
+
+def walk_stack(frame: Optional[FrameType]) -> list[FrameType]:
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class SamplingProfiler:
+
+    """
+    Samples the stacks of all threads from a helper thread with `sys._current_frames()` and, less often, the stacks of
+    the asyncio tasks waiting on the event loop. The result are counts of collapsed stacks which flamegraph tools read.
+    `stacks` is only changed and read under `lock`
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None, interval: float = 0.01, task_interval: float = 0.1):
+        self.loop = loop
+        self.interval = interval
+        self.task_interval = task_interval
+        self.stacks: Counter[str] = Counter()
+        self.lock = threading.Lock()
+        self.samples = 0
+        self.__stop = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            raise RuntimeError("The profiler is already running")
+
+        with self.lock:
+            self.stacks.clear()
+        self.samples = 0
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__run, name="sampling-profiler", daemon=True)
+        self.__thread.start()
+        logging.info("Sampling profiler started")
+
+    def stop(self) -> None:
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+        logging.info("Sampling profiler stopped after %i samples", self.samples)
+
+    async def profile(self, seconds: float) -> str:
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.stop()
+        return self.collapsed()
+
+    def __run(self) -> None:
+        own_id = threading.get_ident()
+        ticks_per_task_sample = max(round(self.task_interval / self.interval), 1)
+        tick = 0
+
+        while not self.__stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            sample = [
+                "thread:%s;%s" % (names.get(thread_id, thread_id), collapse(walk_stack(frame)))
+                for thread_id, frame in sys._current_frames().items()
+                if thread_id != own_id
+            ]
+            with self.lock:
+                self.stacks.update(sample)
+            self.samples += 1
+
+            # task stacks may only be read on the loop, so that sample is scheduled there
+            tick += 1
+            if self.loop is not None and tick % ticks_per_task_sample == 0:
+                try:
+                    self.loop.call_soon_threadsafe(self.__sample_tasks)
+                except RuntimeError:
+                    # the loop was closed
+                    self.loop = None
+
+    def __sample_tasks(self) -> None:
+        sample = []
+        for task in asyncio.all_tasks(self.loop):
+            stack = task.get_stack()
+            if stack:
+                sample.append("task:%s;%s" % (task.get_name(), collapse(stack)))
+        with self.lock:
+            self.stacks.update(sample)
+
+    def snapshot(self) -> Counter[str]:
+        with self.lock:
+            return self.stacks.copy()
+
+    def collapsed(self) -> str:
+        return "\n".join("%s %i" % (stack, count) for stack, count in self.snapshot().most_common())
+
+    def top_leaves(self, n: int = 10, prefix: str = "thread:") -> list[tuple[str, int]]:
+        """Returns the functions most often on top of the sampled stacks, i.e. where the time is spent"""
+        leaves: Counter[str] = Counter()
+        for stack, count in self.snapshot().items():
+            if stack.startswith(prefix):
+                leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import marshal
+import sys
+import tempfile
+from asyncio.subprocess import DEVNULL, PIPE
+from types import CodeType
+from typing import Any, Awaitable, Callable, Optional
+
+import sandbox_worker
+from sandbox_worker import HEADER
+
+
+class _Worker:
+
+    """A pre-started interpreter waiting for snippets on its stdin"""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+
+    @classmethod
+    async def start(cls, memory_limit: int, fn_name: str) -> "_Worker":
+        # -I: neither the directory of the bot nor PYTHON* variables end up in sys.path of the worker
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-I", sandbox_worker.__file__, str(memory_limit), fn_name,
+            stdin=PIPE, stdout=PIPE, stderr=DEVNULL, cwd=tempfile.gettempdir()
+        )
+        return cls(process)
+
+    async def send(self, code: CodeType) -> None:
+        data = marshal.dumps(code)
+        self.process.stdin.write(HEADER.pack(len(data)) + data)
+        await self.process.stdin.drain()
+
+    async def receive(self) -> tuple[str, str]:
+        size, = HEADER.unpack(await self.process.stdout.readexactly(HEADER.size))
+        return marshal.loads(await self.process.stdout.readexactly(size))
+
+    def kill(self) -> None:
+        # the child watcher of asyncio reaps the process, nothing waits for it here
+        if self.process.returncode is None:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+
+
+class SnippetPool:
+
+    """
+    Runs compiled debug snippets in pre-started worker processes. A snippet which times out or kills its worker
+    never blocks the event loop of the bot; the worker is replaced by a fresh one
+    """
+
+    def __init__(self, fn_name: str, size: int = 2, timeout: float = 10.0, memory_limit: int = 256 * 1024 ** 2):
+        self.fn_name = fn_name
+        self.size = size
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.idle: asyncio.Queue[_Worker] = asyncio.Queue()
+        self.workers: set[_Worker] = set()
+        self.closed = False
+
+    async def start(self) -> None:
+        await asyncio.gather(*(self.spawn() for _ in range(self.size)))
+        logging.info("Started %i sandbox workers", len(self.workers))
+
+    async def spawn(self) -> None:
+        try:
+            worker = await _Worker.start(self.memory_limit, self.fn_name)
+        except OSError as e:
+            logging.error("Failed to start a sandbox worker: %s", e)
+            return
+
+        if self.closed:
+            worker.kill()
+            return
+        self.workers.add(worker)
+        self.idle.put_nowait(worker)
+
+    def replace(self, worker: _Worker) -> None:
+        self.workers.discard(worker)
+        worker.kill()
+        if not self.closed:
+            asyncio.ensure_future(self.spawn())
+
+    async def run(self, code: CodeType, output: Optional[Callable[[str], Awaitable[Any]]] = None) -> tuple[str, str]:
+        """
+        Runs the code in a worker and awaits `output` for every chunk the snippet prints
+        @return: a tuple of the kind (`result`, `error` or `timeout`) and the repr of the result or the traceback
+        @rtype: tuple[str, str]
+        """
+        worker = await self.idle.get()
+        loop = asyncio.get_running_loop()
+        healthy = False
+        try:
+            await worker.send(code)
+            deadline = loop.time() + self.timeout
+
+            while True:
+                kind, value = await asyncio.wait_for(worker.receive(), max(deadline - loop.time(), 0))
+                if kind == "output":
+                    if output is not None:
+                        await output(value)
+                    continue
+
+                healthy = "MemoryError" not in value
+                return kind, value
+
+        except asyncio.TimeoutError:
+            return "timeout", "The snippet did not finish within %ss" % self.timeout
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return "error", "The worker process died (exit code %s)" % await worker.process.wait()
+
+        finally:
+            if healthy:
+                self.idle.put_nowait(worker)
+            else:
+                self.replace(worker)
+
+    def close(self) -> None:
+        self.closed = True
+        for worker in self.workers:
+            worker.kill()
+        self.workers.clear()
+        logging.info("Stopped sandbox workers")
@@ -0,0 +1,98 @@
+"""
+Entry point of the worker processes of `sandbox.SnippetPool`. It is started as a new interpreter and only imports the
+standard library, so neither the config with the token nor the state of the bot is in its memory
+
+Messages are a 4 byte length followed by the marshalled data. The bot sends code objects, the worker answers with
+`(kind, text)` tuples where kind is `output`, `result` or `error`
+"""
+import asyncio
+import marshal
+import os
+import pprint
+import resource
+import struct
+import sys
+import time
+import traceback
+from typing import Any, BinaryIO
+
+HEADER = struct.Struct("!I")
+
+# limits for the data sent back by a worker
+MAX_RESULT_LENGTH = 64_000
+OUTPUT_FLUSH_SIZE = 1800
+OUTPUT_FLUSH_INTERVAL = 0.5
+
+
+def read_message(stream: BinaryIO) -> Any:
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise EOFError
+    size, = HEADER.unpack(header)
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError
+    return marshal.loads(data)
+
+
+def write_message(stream: BinaryIO, message: Any) -> None:
+    data = marshal.dumps(message)
+    stream.write(HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def address_space() -> int:
+    """Returns the current virtual memory size of the process in bytes or 0 if it is unknown"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def main(memory_limit: int, fn_name: str) -> None:
+    # the protocol gets its own copy of stdout, snippets writing to sys.stdout can't break it
+    channel = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    requests = sys.stdin.buffer
+
+    # the limit is added to what the interpreter maps after its start
+    if memory_limit:
+        limit = address_space() + memory_limit
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    while True:
+        try:
+            code = read_message(requests)
+        except (EOFError, OSError):
+            return
+
+        output: list[str] = []
+        last_flush = time.monotonic()
+
+        def flush() -> None:
+            nonlocal last_flush
+            if output:
+                write_message(channel, ("output", "".join(output)))
+                output.clear()
+            last_flush = time.monotonic()
+
+        def sandbox_print(*values: Any, sep=" ", end="\n", **_) -> None:
+            output.append(sep.join(str(x) for x in values) + end)
+            if sum(len(x) for x in output) >= OUTPUT_FLUSH_SIZE or time.monotonic() - last_flush >= OUTPUT_FLUSH_INTERVAL:
+                flush()
+
+        namespace = {"__name__": "__sandbox__", "print": sandbox_print}
+        try:
+            exec(code, namespace)
+            result = asyncio.run(namespace[fn_name]())
+        except BaseException as e:
+            flush()
+            write_message(channel, ("error", "".join(traceback.format_exception(type(e), e, e.__traceback__))[-MAX_RESULT_LENGTH:]))
+        else:
+            flush()
+            write_message(channel, ("result", pprint.pformat(result, depth=4)[:MAX_RESULT_LENGTH]))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]), sys.argv[2])
@@ -0,0 +1,117 @@
+import time
+
+# monotonic time the process started, main.py imports this module before anything else
+STARTED = time.monotonic()
+
+import asyncio
+import importlib
+import importlib.util
+import logging
+import sys
+from types import ModuleType
+from typing import Iterable, Optional
+
+import discord
+from discord.ext import commands
+from discord.ext.commands.errors import ExtensionError
+
+import config
+import outbound
+from functions import embed_message
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Returns the module which is executed when an attribute is used the first time. Names imported with
+    `from module import name` are used immediately, so the module needs to be imported as a whole
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError("No module named '%s'" % name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class ExtensionTiming:
+
+    __slots__ = ("name", "load_time", "error")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.load_time = 0.0
+        self.error: Optional[BaseException] = None
+
+
+class StartupManager:
+
+    """
+    Loads the extensions once the bot is connected, so connecting does not wait for them. `load_extension` executes the
+    module and runs its setup on the loop, which is timed per extension and reported to the log channel
+    """
+
+    def __init__(self, bot: commands.Bot, extensions: Iterable[str]):
+        self.bot = bot
+        self.extensions = list(extensions)
+        self.timings: dict[str, ExtensionTiming] = {}
+        self.ready_time: Optional[float] = None
+        self.loaded_time: Optional[float] = None
+        self.loaded = asyncio.Event()
+        self.__started = False
+
+    async def load(self) -> bool:
+        """
+        Loads the extensions on the first call, later calls wait until that is done
+        @return: whether this call loaded the extensions
+        @rtype: bool
+        """
+        if self.__started:
+            await self.loaded.wait()
+            return False
+        self.__started = True
+        self.ready_time = time.monotonic() - STARTED
+
+        # the module bodies register commands on the bot, so they are executed one after another
+        for name in ["cogs.%s" % name for name in self.extensions]:
+            timing = self.timings[name] = ExtensionTiming(name)
+            start = time.perf_counter()
+            try:
+                self.bot.load_extension(name)
+            except ExtensionError as e:
+                timing.error = e
+                logging.warning("failed to load extension '%s' beacuse of '%s'", name, str(e))
+            else:
+                logging.info("Extension '%s' loaded", name)
+            timing.load_time = time.perf_counter() - start
+
+        self.loaded_time = time.monotonic() - STARTED
+        self.loaded.set()
+        logging.info("Loaded extensions")
+        return True
+
+    def get_report(self) -> discord.Embed:
+        lines = [
+            "%-20s %8.1fms  %s" % (t.name, t.load_time * 1000, "failed" if t.error is not None else "ok")
+            for t in self.timings.values()
+        ]
+        return embed_message(
+            title="Startup",
+            description="Connected after %.2fs, extensions loaded after %.2fs\n```\n%-20s %10s\n%s```" % (
+                self.ready_time or 0, self.loaded_time or 0, "extension", "load", "\n".join(lines)
+            ),
+            color=config.COLOR.INFO
+        )
+
+    async def send_report(self) -> None:
+        channel = self.bot.get_channel(config.LOG_CHANNEL_ID)
+        if channel is None:
+            logging.warning("Could not find channel with id %s", config.LOG_CHANNEL_ID)
+            return
+        outbound.post(channel, outbound.Priority.DIAGNOSTICS, embed=self.get_report())
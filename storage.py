@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import metrics
+from functions import set_json_path
+
+
+# not reloaded by reloader.py, saves in flight hold the locks of STORAGE
+RELOADABLE = False
+
+
+def read_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_text(path: str, text: str) -> None:
+    """Writes the text to a temporary file first and replaces the file with it, so readers never see half a file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json(path: str, data: Any) -> None:
+    start = time.perf_counter()
+    write_text(path, json.dumps(data, indent=4, sort_keys=True))
+    metrics.JSON_WRITE_SECONDS.observe(time.perf_counter() - start, function="storage", file=os.path.basename(path))
+
+
+class Storage:
+
+    """
+    Loads and saves the json data files in its own threads, so disk I/O never blocks the event loop. Saves and updates
+    of the same file are done one after another
+    """
+
+    def __init__(self, workers: int = 2):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="storage")
+        self.locks: dict[str, asyncio.Lock] = {}
+
+    def get_lock(self, path: str) -> asyncio.Lock:
+        return self.locks.setdefault(os.path.abspath(path), asyncio.Lock())
+
+    async def load(self, path: str) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, read_json, path)
+
+    async def save(self, path: str, data: Any) -> None:
+        async with self.get_lock(path):
+            await asyncio.get_running_loop().run_in_executor(self.executor, write_json, path, data)
+
+    async def save_text(self, path: str, text: str) -> None:
+        async with self.get_lock(path):
+            await asyncio.get_running_loop().run_in_executor(self.executor, write_text, path, text)
+
+    async def update(self, path: str, func: Callable[[Any], Any]) -> Any:
+        """
+        Loads the file, lets `func` change the data and saves it, while no other save of the file can happen in between
+        @return: the changed data
+        """
+        loop = asyncio.get_running_loop()
+        async with self.get_lock(path):
+            data = await loop.run_in_executor(self.executor, read_json, path)
+            func(data)
+            await loop.run_in_executor(self.executor, write_json, path, data)
+        return data
+
+    async def save_on_path(self, file: str, path: str, value: Any) -> None:
+        """Sets the value at the slash separated path of the json file, see `functions.set_json_path`"""
+        await self.update(file, lambda jsn: set_json_path(jsn, path, value))
+
+
+STORAGE = Storage()